@@ -0,0 +1,152 @@
+"""边框检测基准：对比逐行扫描的旧实现与当前实现，并校验结果一致；4k以上的大格子另测由粗到细检测
+
+python benchmarks/bench_border.py
+"""
+import os
+import sys
+import time
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from imgrid.core import detect_border_with_otsu, detect_border_pyramid, grid_cells, BorderIndex
+
+def legacy_detect_border_with_otsu(img_array):
+	"""旧实现（逐行/列调用np.mean），作为正确性参照"""
+	if len(img_array.shape) == 3:
+		gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+	else:
+		gray = img_array
+	_, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+	vertical_sum = np.sum(binary, axis=0)
+	horizontal_sum = np.sum(binary, axis=1)
+	top_val = binary[0, 0]
+	bottom_val = binary[-1, -1]
+	left_val = binary[0, 0]
+	right_val = binary[-1, -1]
+	top_crop = 0
+	for i in range(len(horizontal_sum)):
+		if np.mean(binary[i, :]) != top_val:
+			top_crop = i
+			break
+	bottom_crop = len(horizontal_sum)
+	for i in range(len(horizontal_sum) - 1, -1, -1):
+		if np.mean(binary[i, :]) != bottom_val:
+			bottom_crop = i + 1
+			break
+	left_crop = 0
+	for i in range(len(vertical_sum)):
+		if np.mean(binary[:, i]) != left_val:
+			left_crop = i
+			break
+	right_crop = len(vertical_sum)
+	for i in range(len(vertical_sum) - 1, -1, -1):
+		if np.mean(binary[:, i]) != right_val:
+			right_crop = i + 1
+			break
+	return top_crop, bottom_crop, left_crop, right_crop
+
+def make_cell(rng, width, height, margin, background=245, noise=True):
+	"""生成带均匀边距的合成格子（内容为随机色块与噪声）"""
+	cell = np.full((height, width, 3), background, np.uint8)
+	top, left = margin
+	bottom, right = height - margin[0] // 2, width - margin[1] // 3
+	if bottom > top and right > left:
+		content = rng.integers(0, 256, (bottom - top, right - left, 3), dtype=np.uint8) if noise else 40
+		cell[top:bottom, left:right] = content
+	return cell
+
+def cases(rng):
+	yield 'tall 1500x8000, margin 40', make_cell(rng, 1500, 8000, (40, 40))
+	yield 'tall 1500x8000, margin 800', make_cell(rng, 1500, 8000, (800, 300))
+	yield 'square 2000x2000, margin 10', make_cell(rng, 2000, 2000, (10, 10))
+	yield 'square 2000x2000, no margin', make_cell(rng, 2000, 2000, (0, 0))
+	yield 'uniform 1000x1000', make_cell(rng, 1000, 1000, (1000, 1000))
+	yield 'dark text 1200x3000', make_cell(rng, 1200, 3000, (120, 60), background=20, noise=False)
+	yield 'small 64x48, margin 3', make_cell(rng, 64, 48, (3, 3))
+
+def timeit(func, arg, repeat):
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = func(arg)
+		best = min(best, time.perf_counter() - start)
+	return best, result
+
+def check_random(rng, count=500):
+	"""随机小格子（含均匀、单像素、非对称边框）上校验结果与旧实现一致"""
+	for _ in range(count):
+		height, width = rng.integers(1, 80, 2)
+		cell = np.full((height, width, 3), rng.integers(0, 256), np.uint8)
+		for _ in range(rng.integers(0, 4)):
+			y, x = rng.integers(0, height), rng.integers(0, width)
+			cell[y:y + rng.integers(1, 20), x:x + rng.integers(1, 20)] = rng.integers(0, 256, 3)
+		assert detect_border_with_otsu(cell) == legacy_detect_border_with_otsu(cell), cell.shape
+
+def main():
+	rng = np.random.default_rng(0)
+	check_random(rng)
+	print(f'{"case":<32}{"legacy ms":>12}{"current ms":>12}{"speedup":>10}')
+	for name, cell in cases(rng):
+		legacy_time, expected = timeit(legacy_detect_border_with_otsu, cell, 3)
+		current_time, result = timeit(detect_border_with_otsu, cell, 3)
+		assert result == expected, f'{name}: {result} != {expected}'
+		print(f'{name:<32}{legacy_time * 1e3:>12.2f}{current_time * 1e3:>12.2f}{legacy_time / current_time:>9.1f}x')
+	bench_index(rng)
+	bench_index(rng, 4000, 4000, 50, 50)
+	bench_index(rng, 1500, 40000, 5, 1)
+	bench_pyramid(rng)
+
+def bench_index(rng, width=4000, height=4000, rows=20, cols=20):
+	"""整图索引与逐格子检测在rows×cols网格上的对比"""
+	image = np.full((height, width, 3), 245, np.uint8)
+	cells = grid_cells((0, 0, width, height), rows, cols)
+	for x, y, w, h in cells:
+		image[y + h // 8:y + h - h // 8, x + w // 6:x + w - w // 5] = rng.integers(0, 256, 3)
+	start = time.perf_counter()
+	index = BorderIndex(image)
+	index.build()  # 索引按需构建，构建耗时单独计
+	build_time = time.perf_counter() - start
+	start = time.perf_counter()
+	expected = [detect_border_with_otsu(image[y:y+h, x:x+w]) for x, y, w, h in cells]
+	direct_time = time.perf_counter() - start
+	start = time.perf_counter()
+	result = [index.detect_border(x, y, w, h) for x, y, w, h in cells]
+	index_time = time.perf_counter() - start
+	assert result == expected
+	print(f'index {width}x{height}, {rows}x{cols} grid: build {build_time * 1e3:.1f} ms, '
+		f'per-cell {direct_time * 1e3:.1f} ms -> index {index_time * 1e3:.1f} ms')
+
+def rgba(cell):
+	"""与load_image相同的RGBA布局"""
+	return np.concatenate([cell, np.full(cell.shape[:2] + (1,), 255, np.uint8)], axis=2)
+
+def pyramid_cases(rng):
+	yield 'photo 4000x6000, margin 300', rgba(make_cell(rng, 4000, 6000, (300, 240)))
+	yield 'blocks 6000x4000, margin 30', rgba(make_cell(rng, 6000, 4000, (30, 900), noise=False))
+	yield 'dark text 4200x6000', rgba(make_cell(rng, 4200, 6000, (500, 400), background=20, noise=False))
+	page = np.full((8000, 4500, 3), 250, np.uint8)
+	page[1200:1201, 2000:2300] = 0  # 缩小时可能被跳过的单像素细线
+	page[1600:7000:90, 600:3900] = 40
+	yield 'text page 4500x8000, 1px line', rgba(cv2.GaussianBlur(page, (5, 5), 1))
+	yield 'no margin 4096x4096', rgba(make_cell(rng, 4096, 4096, (0, 0)))
+	# 内容块中每隔8行/列的像素恰为浅色：每隔8取样时只取到这些像素，由取样求的阈值会把细线当作背景（面积平均不受影响）
+	aliased = np.full((4096, 4096, 3), 250, np.uint8)
+	block = aliased[1000:3000, 800:3300]
+	block[:] = 120
+	block[::8, ::8] = 200
+	aliased[201:204, 500:3600] = 189
+	yield 'aliased dither 4096x4096', rgba(aliased)
+
+def bench_pyramid(rng):
+	"""4k以上的大格子上由粗到细检测与精确检测的对比，边界相差不得超过1像素"""
+	print(f'\n{"pyramid case":<32}{"exact ms":>12}{"pyramid ms":>12}{"speedup":>10}{"max diff":>10}')
+	for name, cell in pyramid_cases(rng):
+		exact_time, expected = timeit(detect_border_with_otsu, cell, 3)
+		pyramid_time, result = timeit(detect_border_pyramid, cell, 3)
+		diff = max(abs(a - b) for a, b in zip(result, expected))
+		assert diff <= 1, f'{name}: {result} != {expected}'
+		print(f'{name:<32}{exact_time * 1e3:>12.2f}{pyramid_time * 1e3:>12.2f}{exact_time / pyramid_time:>9.1f}x{diff:>8} px')
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,61 @@
+"""分割图片格式基准：各输出格式与编码档位的编码耗时（线程池并行）和总字节数
+
+python benchmarks/bench_formats.py
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from imgrid.core import IMAGE_FORMATS, LOSSY_FORMATS, grid_cells, save_cells
+from bench_pdf import screenshot, photo
+
+# (格式, 档位, 质量)，PNG的档位即PNG_COMPRESSION
+CASES = [
+	('png', 'fast', None),
+	('png', 'default', None),
+	('png', 'max', None),
+	('jpeg', 'default', 90),
+	('jpeg', 'default', 75),
+	('webp', 'fast', 90),
+	('webp', 'default', 90),
+	('webp', 'default', 75),
+	('avif', 'fast', 75),
+	('avif', 'default', 75),
+	('tiff', 'fast', None),
+	('tiff', 'default', None),
+	('tiff', 'max', None),
+]
+
+def rgba(image):
+	"""与load_image相同的RGBA布局，格子为其上的视图"""
+	return np.concatenate([image, np.full(image.shape[:2] + (1,), 255, np.uint8)], axis=2)
+
+def bench(name, image, rows, cols, directory):
+	height, width = image.shape[:2]
+	cells = [image[y:y+h, x:x+w] for x, y, w, h in grid_cells((0, 0, width, height), rows, cols)]
+	print(f'{name} {width}x{height}, {rows}x{cols} grid, {os.cpu_count()} threads')
+	for format, effort, quality in CASES:
+		out = os.path.join(directory, 'out')
+		os.makedirs(out)
+		kwargs = {'compression': effort} if format == 'png' else {'effort': effort, 'quality': quality or 90}
+		start = time.perf_counter()
+		_, failures = save_cells(cells, out, 'cell', cols, format=format, **kwargs)
+		elapsed = time.perf_counter() - start
+		assert not failures, failures
+		size = sum(entry.stat().st_size for entry in os.scandir(out))
+		label = f'{format} {effort}' + (f' q{quality}' if format in LOSSY_FORMATS else '')
+		print(f'  {label:<24}{elapsed * 1e3:>10.0f} ms{size / 1024:>10.0f} KiB  ({len(os.listdir(out))} {IMAGE_FORMATS[format]})')
+		shutil.rmtree(out)
+
+def main():
+	rng = np.random.default_rng(0)
+	with tempfile.TemporaryDirectory() as directory:
+		bench('screenshot', rgba(screenshot(rng, 2000, 12000)), 10, 1, directory)
+		bench('photo', rgba(photo(rng, 4000, 3000)), 3, 3, directory)
+
+if __name__ == '__main__':
+	main()
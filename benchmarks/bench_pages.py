@@ -0,0 +1,77 @@
+"""自动分页基准：长截图按A4比例分页时行墨迹密度和动态规划的耗时（应与高度成正比），以及切到文字/图片的页数与均分的对比；
+并检查各页高度都在[最小页高, 页面高度]内（最后一页可以更短），包括只有少量墨迹的边界情况
+
+python benchmarks/bench_pages.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from imgrid.core import PAGE_SLACK, PDF_PRESETS, grid_cells, ink_profile, page_breaks
+
+WIDTH = 1600
+HEIGHTS = (25000, 50000, 100000)
+# (长度, 墨迹行区间, 页面高度)：墨迹之后的空白不足一页、墨迹只在开头等边界情况
+EDGES = [
+	(2500, (100, 200), 1000),
+	(1001, (0, 6), 1000),
+	(1001, (995, 1001), 1000),
+	(3000, (0, 3000), 1000),
+	(2950, (1800, 1900), 1000),
+	(1500, (0, 0), 1000),
+]
+
+def document(rng, width, height):
+	"""网页文档类长截图（灰度）：行高20的文字行、段落间距和偶尔的大图，返回(图片, 内容区间列表)"""
+	image = np.full((height, width), 250, np.uint8)
+	blocks = []
+	y = 60
+	while True:
+		block = int(rng.integers(300, 900)) if rng.random() < 0.05 else 20
+		if y + block > height - 60:
+			break
+		image[y:y + block, 100:width - 100] = rng.integers(0, 120, (block, width - 200), np.uint8)
+		blocks.append((y, y + block))
+		y += block + (int(rng.integers(30, 60)) if rng.random() < 0.15 else 12)
+	return image, blocks
+
+def through_content(cuts, blocks):
+	"""落在内容区间内部的切分数"""
+	starts, ends = np.array(blocks).T
+	return sum(bool(np.any((starts < cut) & (cut < ends))) for cut in cuts)
+
+def check_pages(cuts, height, page_height):
+	"""断言各页高度在[最小页高, 页面高度]内，最后一页只要求不超过页面高度"""
+	longest = int(page_height)
+	shortest = round(longest * (1 - PAGE_SLACK))
+	pages = np.diff([0, *cuts, height])
+	assert all(shortest <= page <= longest for page in pages[:-1]) and 0 < pages[-1] <= longest, (height, page_height, cuts)
+
+def main():
+	for height, rows, page_height in EDGES:
+		profile = np.zeros(height, np.float32)
+		profile[slice(*rows)] = 1
+		check_pages(page_breaks(profile, page_height), height, page_height)
+	print(f'{len(EDGES)} edge profiles: page heights ok')
+	rng = np.random.default_rng(0)
+	page_width, page_height = PDF_PRESETS['A4']
+	ideal = WIDTH * page_height / page_width
+	print(f'{WIDTH} wide, A4 page height {ideal:.0f} px')
+	for height in HEIGHTS:
+		image, blocks = document(rng, WIDTH, height)
+		start = time.perf_counter()
+		profile = ink_profile(image)
+		profiled = time.perf_counter()
+		cuts = page_breaks(profile, ideal)
+		elapsed = time.perf_counter() - profiled
+		check_pages(cuts, height, ideal)
+		pages = np.diff([0, *cuts, height])
+		uniform = [y for _, y, _, _ in grid_cells((0, 0, WIDTH, height), len(cuts) + 1, 1)[1:]]
+		print(f'  {WIDTH}x{height}: profile {(profiled - start) * 1e3:.0f} ms, page_breaks {elapsed * 1e3:.0f} ms, '
+			f'{len(pages)} pages {pages[:-1].min()}-{pages[:-1].max()} px, '
+			f'cuts through content {through_content(cuts, blocks)} (uniform {through_content(uniform, blocks)})')
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,90 @@
+"""PDF导出基准：对比旧的逐页PNG中转与当前的Flate/JPEG直传，以及原图只嵌入一次、JPEG原图直接嵌入的耗时和文件大小
+
+python benchmarks/bench_pdf.py
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from PIL import Image
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import ImageReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from imgrid.core import AppConfig, grid_cells, export_pdf
+
+def legacy_export_pdf(images, save_path, page_width, page_height):
+	"""旧实现：每页先编码为PNG再交给reportlab解码、重新压缩"""
+	c = canvas.Canvas(save_path, pagesize=(page_width, page_height))
+	for img_array in images:
+		border = np.median(np.concatenate([img_array[0, :], img_array[-1, :], img_array[:, 0], img_array[:, -1]]), axis=0)
+		c.setFillColorRGB(*[int(i)/255 for i in border])
+		c.rect(0, 0, page_width, page_height, fill=1)
+		img_buffer = io.BytesIO()
+		Image.fromarray(img_array).save(img_buffer, format='PNG')
+		img_buffer.seek(0)
+		c.drawImage(ImageReader(img_buffer), 0, 0, page_width, page_height, preserveAspectRatio=True)
+		c.showPage()
+	c.save()
+
+def screenshot(rng, width, height):
+	"""截图类内容：大块纯色与少量色块"""
+	image = np.full((height, width, 3), 245, np.uint8)
+	for _ in range(200):
+		x, y = rng.integers(0, width), rng.integers(0, height)
+		image[y:y + rng.integers(5, 60), x:x + rng.integers(20, 400)] = rng.integers(0, 256, 3)
+	return image
+
+def photo(rng, width, height):
+	"""照片类内容：平滑渐变叠加噪声"""
+	yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+	base = np.stack([xx / width, yy / height, (xx + yy) / (width + height)], axis=-1) * 200
+	return np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+
+def run(label, func, path):
+	start = time.perf_counter()
+	func(path)
+	elapsed = time.perf_counter() - start
+	print(f'{label:<40}{elapsed * 1e3:>10.0f} ms{os.path.getsize(path) / 1024:>10.0f} KiB')
+
+def bench(name, image, rows, cols, page, directory):
+	height, width = image.shape[:2]
+	cells = [image[y:y+h, x:x+w] for x, y, w, h in grid_cells((0, 0, width, height), rows, cols)]
+	print(f'{name} {width}x{height}, {rows}x{cols} grid')
+	path = os.path.join(directory, 'out.pdf')
+	run('  legacy PNG round-trip', lambda p: legacy_export_pdf(cells, p, *page), path)
+	run('  flate', lambda p: export_pdf(cells, p, *page), path)
+	run('  jpeg q90', lambda p: export_pdf(cells, p, *page, 'jpeg', 90), path)
+	run('  jpeg q75', lambda p: export_pdf(cells, p, *page, 'jpeg', 75), path)
+	run('  flate single image', lambda p: export_pdf(cells, p, *page, single_image=True), path)
+	run('  jpeg q90 single image', lambda p: export_pdf(cells, p, *page, 'jpeg', 90, single_image=True), path)
+
+def bench_passthrough(image, page, directory):
+	"""导出JPEG原图（1×1网格及单图模式下的3×3网格）：直接嵌入与解码后重新编码的对比"""
+	source = os.path.join(directory, 'source.jpg')
+	Image.fromarray(image).save(source, quality=90)
+	decoded = np.asarray(Image.open(source))
+	height, width = decoded.shape[:2]
+	print(f'JPEG source {width}x{height}')
+	path = os.path.join(directory, 'out.pdf')
+	run('  legacy PNG round-trip', lambda p: legacy_export_pdf([decoded], p, *page), path)
+	run('  flate', lambda p: export_pdf([decoded], p, *page), path)
+	run('  jpeg q90 re-encode', lambda p: export_pdf([decoded], p, *page, 'jpeg', 90), path)
+	run('  jpeg passthrough', lambda p: export_pdf([decoded], p, *page, source=source), path)
+	cells = [decoded[y:y+h, x:x+w] for x, y, w, h in grid_cells((0, 0, width, height), 3, 3)]
+	run('  3x3 jpeg q90 re-encode', lambda p: export_pdf(cells, p, *page, 'jpeg', 90), path)
+	run('  3x3 single image passthrough', lambda p: export_pdf(cells, p, *page, source=source, single_image=True), path)
+
+def main():
+	rng = np.random.default_rng(0)
+	page = AppConfig().page_size()
+	with tempfile.TemporaryDirectory() as directory:
+		bench('screenshot', screenshot(rng, 2000, 12000), 10, 1, page, directory)
+		bench('photo', photo(rng, 4000, 3000), 3, 3, page, directory)
+		bench('scroll screenshot', screenshot(rng, 2000, 60000), 40, 1, page, directory)
+		bench_passthrough(photo(rng, 4000, 3000), page, directory)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,61 @@
+"""低内存导出基准：对比整图切分与按网格行流式导出（--low-memory）的耗时和子进程峰值常驻内存，并检查输出逐字节相同
+
+python benchmarks/bench_stream.py
+"""
+import os
+import sys
+import time
+import filecmp
+import tempfile
+import subprocess
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_pdf import screenshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (名称, 宽, 高, 行数, 格式)
+CASES = [
+	('scroll png', 2000, 60000, 30, 'PNG'),
+	('scroll bmp', 2000, 60000, 30, 'BMP'),
+	('scroll tiff', 2000, 60000, 30, 'TIFF'),
+]
+
+# 经一个小的中间进程启动导出：fork出的子进程的ru_maxrss会计入fork时父进程的常驻内存（本脚本持有合成图片）
+MEASURE = ('import sys, resource, subprocess; subprocess.run(sys.argv[1:], check=True, stdout=subprocess.DEVNULL); '
+	'print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)')
+
+def run(source, output, rows, *extra):
+	"""在子进程中运行命令行导出，返回(耗时, 峰值常驻内存MiB)"""
+	command = [sys.executable, '-m', 'imgrid', source, '-o', output, '--config', os.devnull,
+		'--rows', str(rows), '--cols', '1', '--cut-border', '--export', 'both', '-j', '1', *extra]
+	start = time.perf_counter()
+	maxrss = subprocess.run([sys.executable, '-c', MEASURE, *command], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+	return time.perf_counter() - start, int(maxrss) / 1024
+
+def same_outputs(a, b):
+	"""两个输出目录的文件逐字节相同（PdfWriter不写入创建时间等元数据，PDF也应逐字节相同）"""
+	names = sorted(os.listdir(a))
+	return names == sorted(os.listdir(b)) and all(filecmp.cmp(os.path.join(a, name), os.path.join(b, name), shallow=False) for name in names)
+
+def main():
+	rng = np.random.default_rng(0)
+	with tempfile.TemporaryDirectory() as directory:
+		for name, width, height, rows, format in CASES:
+			source = os.path.join(directory, 'scroll.' + format.lower())
+			Image.fromarray(screenshot(rng, width, height)).save(source, format)
+			print(f'{name} {width}x{height}, {rows}x1 grid, {os.path.getsize(source) / 2**20:.0f} MiB file, '
+				f'{width * height * 4 / 2**20:.0f} MiB RGBA')
+			outputs = []
+			for label, extra in (('full image', ()), ('--low-memory', ('--low-memory',))):
+				output = os.path.join(directory, label.strip('-'))
+				elapsed, maxrss = run(source, output, rows, *extra)
+				outputs.append(output)
+				print(f'  {label:<16}{elapsed * 1e3:>10.0f} ms{maxrss:>10.0f} MiB maxrss')
+			print(f'  outputs identical: {same_outputs(*outputs)}')
+			os.remove(source)
+
+if __name__ == '__main__':
+	main()
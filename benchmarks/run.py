@@ -0,0 +1,308 @@
+"""基准测试套件：在合成图片上测量读图、边框检测、分割和导出各阶段的耗时与峰值内存，结果写入JSON
+
+python benchmarks/run.py                          # 全部尺寸，写入benchmarks/results/<提交>.json
+python benchmarks/run.py --sizes 1k 4k -o a.json  # 指定尺寸和输出文件
+python benchmarks/run.py --compare a.json b.json  # 对比两次结果
+
+startup为冷启动：在新进程中测量导入imgrid.gui和窗口首次绘制（均从进程内开始导入时计时）的耗时。
+每个尺寸在单独的子进程中运行（界面部分使用offscreen QPA），因此进程峰值内存互不影响。
+耗时取多次运行的最小值；峰值内存为额外一次运行中tracemalloc记录的Python/NumPy分配峰值，
+maxrss_mb为该子进程到此阶段为止的常驻内存峰值（包含Qt和OpenCV的分配）。
+分割和导出阶段另外检查格子是整图的视图、分配峰值不到整图的一半（否则说明复制了整图），不满足时报错。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+try:
+	import resource
+except ImportError:  # Windows
+	resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STARTUP = 'startup'
+
+# 尺寸名: (宽, 高)
+SIZES = {
+	'1k': (1000, 1000),
+	'4k': (4000, 4000),
+	'scroll': (2000, 60000),  # 长截图
+}
+
+# 每个尺寸测试的网格(行, 列)
+GRIDS = {
+	'1k': [(3, 3), (10, 10)],
+	'4k': [(3, 3), (20, 20)],
+	'scroll': [(30, 1), (60, 2)],
+}
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> np.ndarray:
+	"""生成类似文档截图的RGB图：浅色背景上按块排布、带随机边距的色块与噪声"""
+	rng = np.random.default_rng(seed)
+	image = np.full((height, width, 3), 245, np.uint8)
+	block_w, block_h = 250, 180
+	for y in range(0, height - block_h + 1, block_h):
+		for x in range(0, width - block_w + 1, block_w):
+			top, left = rng.integers(10, 60, 2)
+			bottom, right = rng.integers(block_h - 50, block_h - 5), rng.integers(block_w - 60, block_w - 5)
+			if rng.random() < 0.5:
+				image[y+top:y+bottom, x+left:x+right] = rng.integers(0, 200, 3)
+			else:
+				image[y+top:y+bottom, x+left:x+right] = rng.integers(0, 256, (bottom - top, right - left, 3), dtype=np.uint8)
+	return image
+
+def maxrss_mb():
+	if resource is None:
+		return None
+	usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return usage / 2**20 if sys.platform == 'darwin' else usage / 2**10  # macOS单位为字节，Linux为KiB
+
+def measure(func, setup=None, repeat: int = 3):
+	"""返回{'seconds', 'peak_mb', 'maxrss_mb'}：计时取最小值，另跑一次用tracemalloc记录分配峰值"""
+	times = []
+	for _ in range(repeat):
+		if setup:
+			setup()
+		start = time.perf_counter()
+		func()
+		times.append(time.perf_counter() - start)
+	if setup:
+		setup()
+	tracemalloc.start()
+	try:
+		func()
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+	return {'seconds': min(times), 'peak_mb': peak / 2**20, 'maxrss_mb': maxrss_mb()}
+
+def check_no_copy(stage: str, result: dict, image_bytes: int):
+	"""分割和导出只读取整图缓冲区上的视图：tracemalloc记录的分配峰值必须远小于整图（复制一次整图至少为其3/4）"""
+	if result['peak_mb'] * 2**20 >= image_bytes / 2:
+		raise AssertionError(f'{stage}: 分配峰值 {result["peak_mb"]:.1f} MB，整图 {image_bytes / 2**20:.1f} MB，疑似复制了整图')
+
+def run_size(size: str, repeat: int):
+	"""在当前进程中测量一个尺寸的所有阶段，逐条返回结果"""
+	os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+	from PySide6.QtWidgets import QApplication, QDialog, QFileDialog, QMessageBox
+	from PySide6.QtCore import QEventLoop
+	from PySide6.QtGui import QImage, QImageReader
+	from imgrid.core import load_image, grid_cells, detect_border_with_otsu, border_cache
+	from imgrid import gui
+
+	width, height = SIZES[size]
+	workdir = tempfile.mkdtemp(prefix='imgrid-bench-')
+	os.chdir(workdir)  # 窗口在工作目录读写config.json，不影响仓库里的配置
+	try:
+		source = os.path.join(workdir, f'{size}.png')
+		Image.fromarray(synthetic_image(width, height)).save(source, compress_level=1)
+		output_dir = os.path.join(workdir, 'out')
+		pdf_path = os.path.join(workdir, 'out.pdf')
+
+		# 导出流程中的对话框直接确认；空白格子裁边后为空图会以警告提示，不影响计时，只有导出失败时报错
+		errors = []
+		def fail(parent, title, text, *args):
+			errors.append(text)
+		QDialog.exec = lambda self: QDialog.DialogCode.Accepted
+		QFileDialog.getExistingDirectory = staticmethod(lambda *args, **kwargs: output_dir)
+		QFileDialog.getSaveFileName = staticmethod(lambda *args, **kwargs: (pdf_path, ''))
+		QMessageBox.information = staticmethod(lambda *args: None)
+		QMessageBox.warning = staticmethod(lambda *args: None)
+		QMessageBox.critical = staticmethod(fail)
+
+		app = QApplication.instance() or QApplication([])
+		window = gui.ImageGridSplitter()
+		window.config.selection_x_normalized = window.config.selection_y_normalized = 0.
+		window.config.selection_w_normalized = window.config.selection_h_normalized = 1.
+		window.config.cut_border = True
+
+		yield None, 'load_image', measure(lambda: load_image(source), repeat=repeat)
+		decoded = QImageReader(source).read()
+		images = []
+		yield None, 'set_image', measure(lambda: window.set_image(*gui.prepare_image(images.pop())), lambda: images.append(decoded.copy()), repeat)
+
+		def finish(action):
+			"""加载、分割和导出在后台任务中执行，计时到任务结束并在界面线程中处理完结果为止"""
+			def run():
+				action()
+				while window.job_handlers:
+					app.processEvents(QEventLoop.ProcessEventsFlag.WaitForMoreEvents)
+				if errors:
+					raise RuntimeError(errors.pop())
+			return run
+
+		# 首次打开时计算内容哈希、边框索引和预览图；再次打开同一张图时命中分析缓存，跳过后两者
+		open_image = finish(lambda: window.load_image(source))
+		yield None, 'open_image', measure(open_image, lambda: (border_cache.clear(), window.analysis_cache.clear()), repeat)
+		window.remember_image()
+		yield None, 'reopen_image', measure(open_image, border_cache.clear, repeat)
+		arr = window.image_array[:, :, :3]
+
+		def clean():
+			border_cache.clear()
+			shutil.rmtree(output_dir, ignore_errors=True)
+			os.makedirs(output_dir)
+
+		for rows, cols in GRIDS[size]:
+			grid = f'{rows}x{cols}'
+			window.rows_spin.setValue(rows)
+			window.cols_spin.setValue(cols)
+			cells = grid_cells((0, 0, width, height), rows, cols)
+			yield grid, 'detect_border_with_otsu', measure(lambda: [detect_border_with_otsu(arr[y:y+h, x:x+w]) for x, y, w, h in cells], repeat=repeat)
+			# 格子必须是整图RGBA缓冲区上的视图（见cell_image），各阶段不复制整图；
+			# 裁剪边框后可能有空格子，空视图与任何数组都不共享内存，不检查
+			split = window.get_split_images()
+			if not all(np.shares_memory(cell, window.image_array) for cell in split if cell.size):
+				raise AssertionError(f'{grid}: 分割得到的格子不是整图的视图')
+			del split
+			for stage, func in (('get_split_images', window.get_split_images), ('split_image', finish(window.split_image)), ('export_pdf', finish(window.export_pdf))):
+				result = measure(func, clean, repeat)
+				check_no_copy(f'{grid} {stage}', result, window.image_array.nbytes)
+				yield grid, stage, result
+	finally:
+		os.chdir(ROOT)
+		shutil.rmtree(workdir, ignore_errors=True)
+
+def startup_worker():
+	"""在当前（新）进程中测量导入imgrid.gui与主窗口首次绘制的耗时，输出一行JSON"""
+	start = time.perf_counter()
+	os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+	from imgrid import gui
+	imported = time.perf_counter()
+	from PySide6.QtCore import QEvent, QObject
+
+	class PaintFilter(QObject):
+		def eventFilter(self, obj, event):
+			if event.type() == QEvent.Type.Paint and not painted_at:
+				painted_at.append(time.perf_counter())
+				app.quit()
+			return False
+
+	painted_at = []
+	workdir = tempfile.mkdtemp(prefix='imgrid-bench-')
+	os.chdir(workdir)  # 窗口在工作目录读取config.json
+	try:
+		app = gui.QApplication([])
+		window = gui.ImageGridSplitter()
+		paint_filter = PaintFilter()
+		window.installEventFilter(paint_filter)
+		window.show()
+		app.exec()
+	finally:
+		os.chdir(ROOT)
+		shutil.rmtree(workdir, ignore_errors=True)
+	print(json.dumps({'import': imported - start, 'first_paint': painted_at[0] - start, 'maxrss_mb': maxrss_mb()}))
+
+def run_startup(repeat: int):
+	"""冷启动耗时：每次在新的子进程中测量，取最小值"""
+	runs = []
+	for _ in range(repeat):
+		process = subprocess.run([sys.executable, os.path.abspath(__file__), '--startup-worker'], stdout=subprocess.PIPE, text=True, check=True)
+		runs.append(json.loads(process.stdout.splitlines()[-1]))
+	for stage in ('import', 'first_paint'):
+		yield None, stage, {'seconds': min(run[stage] for run in runs), 'peak_mb': None, 'maxrss_mb': max(run['maxrss_mb'] or 0 for run in runs)}
+
+def git_revision():
+	try:
+		return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return 'unknown'
+
+def environment():
+	import cv2
+	import PySide6
+	return {
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'cpu_count': os.cpu_count(),
+		'numpy': np.__version__,
+		'opencv': cv2.__version__,
+		'pyside6': PySide6.__version__,
+	}
+
+def print_result(result):
+	peak = f'{result["peak_mb"]:>10.1f} MB' if result['peak_mb'] is not None else ''
+	print(f'{result["size"]:<8}{result["grid"] or "":<8}{result["stage"]:<26}{result["seconds"] * 1e3:>10.1f} ms{peak}')
+
+def run(sizes, repeat: int, output: str):
+	report = {
+		'revision': git_revision(),
+		'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'repeat': repeat,
+		'environment': environment(),
+		'results': [],
+	}
+	for size in sizes:
+		if size == STARTUP:
+			for grid, stage, result in run_startup(repeat):
+				report['results'].append({'size': size, 'grid': grid, 'stage': stage, **result})
+				print_result(report['results'][-1])
+			continue
+		# 每个尺寸一个子进程，逐行输出JSON结果
+		process = subprocess.run(
+			[sys.executable, os.path.abspath(__file__), '--worker', size, '--repeat', str(repeat)],
+			stdout=subprocess.PIPE, text=True
+		)
+		if process.returncode != 0:
+			print(f'{size}: 子进程失败 (退出码 {process.returncode})', file=sys.stderr)
+		for line in process.stdout.splitlines():
+			result = json.loads(line)
+			report['results'].append(result)
+			print_result(result)
+
+	os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+	with open(output, 'w') as f:
+		json.dump(report, f, indent=2)
+	print(f'结果已写入 {output}')
+
+def compare(base_path: str, new_path: str):
+	"""按(尺寸, 网格, 阶段)对比两份结果的耗时与峰值内存"""
+	with open(base_path) as f:
+		base = json.load(f)
+	with open(new_path) as f:
+		new = json.load(f)
+	base_results = {(r['size'], r['grid'], r['stage']): r for r in base['results']}
+	print(f'{base["revision"]} -> {new["revision"]}')
+	for result in new['results']:
+		key = (result['size'], result['grid'], result['stage'])
+		old = base_results.get(key)
+		if old is None:
+			continue
+		print(f'{key[0]:<8}{key[1] or "":<8}{key[2]:<26}'
+			f'{old["seconds"] * 1e3:>10.1f} -> {result["seconds"] * 1e3:>10.1f} ms ({result["seconds"] / old["seconds"]:>5.2f}x)'
+			+ (f'{old["peak_mb"]:>9.1f} -> {result["peak_mb"]:>7.1f} MB' if result['peak_mb'] is not None and old['peak_mb'] is not None else ''))
+
+def main():
+	parser = argparse.ArgumentParser(description='imgrid基准测试')
+	parser.add_argument('--sizes', nargs='+', choices=(STARTUP, *SIZES), default=[STARTUP, *SIZES])
+	parser.add_argument('--repeat', type=int, default=3, help='每个阶段的计时次数（取最小值）')
+	parser.add_argument('-o', '--output', help='结果JSON路径（默认benchmarks/results/<提交>.json）')
+	parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='对比两份结果JSON')
+	parser.add_argument('--worker', choices=tuple(SIZES), help=argparse.SUPPRESS)
+	parser.add_argument('--startup-worker', action='store_true', help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.startup_worker:
+		startup_worker()
+	elif args.worker:
+		for grid, stage, result in run_size(args.worker, args.repeat):
+			print(json.dumps({'size': args.worker, 'grid': grid, 'stage': stage, **result}), flush=True)
+	elif args.compare:
+		compare(*args.compare)
+	else:
+		output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'{git_revision()}.json')
+		run(args.sizes, args.repeat, output)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,57 @@
+"""图片网格分割工具"""
+from .core import (
+	AppConfig,
+	PDF_PRESETS,
+	PDF_ENCODINGS,
+	load_image,
+	selection_rect,
+	crop_rect,
+	grid_cells,
+	detect_grid,
+	detect_pages,
+	detect_border_with_otsu,
+	BorderCache,
+	border_cache,
+	BorderIndex,
+	image_hash,
+	AnalysisCache,
+	preview_rects,
+	StripReader,
+	split_cells,
+	stream_cells,
+	save_cells,
+	Cancelled,
+	PdfWriter,
+	export_pdf,
+)
+from .batch import ImageResult, process_image, run_batch, merge_pdf
+
+__all__ = [
+	'AppConfig',
+	'PDF_PRESETS',
+	'PDF_ENCODINGS',
+	'load_image',
+	'selection_rect',
+	'crop_rect',
+	'grid_cells',
+	'detect_grid',
+	'detect_pages',
+	'detect_border_with_otsu',
+	'BorderCache',
+	'border_cache',
+	'BorderIndex',
+	'image_hash',
+	'AnalysisCache',
+	'preview_rects',
+	'StripReader',
+	'split_cells',
+	'stream_cells',
+	'save_cells',
+	'Cancelled',
+	'PdfWriter',
+	'export_pdf',
+	'ImageResult',
+	'process_image',
+	'run_batch',
+	'merge_pdf',
+]
@@ -0,0 +1,10 @@
+import sys
+
+if __name__ == '__main__':  # 批量处理的工作进程（spawn）会以__mp_main__重新导入本模块
+	if len(sys.argv) > 1:
+		# 带参数时以无界面模式运行，不加载Qt
+		from .cli import main
+		sys.exit(main())
+	else:
+		from .gui import main
+		main()
@@ -0,0 +1,284 @@
+"""批量处理：对多张图片套用同一选区和网格，多进程并行处理多张图片，单进程时解码和检测边框与编码写出按流水线重叠（不依赖Qt）"""
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from . import trace
+from .core import AppConfig, IMAGE_FORMATS, load_image, StripReader, selection_rect, crop_rect, detect_grid, detect_pages, BorderIndex, split_cells, stream_cells, save_cells, PdfWriter, add_cells, export_pdf
+
+EXPORT_TYPES = ('png', 'pdf', 'both')  # png为分割图片（格式见AppConfig.image_format）
+
+@dataclass
+class ImageResult:
+	"""单张图片的处理结果，error为None表示成功"""
+	path: str
+	outputs: list = field(default_factory=list)
+	megapixels: float = 0.
+	seconds: float = 0.
+	error: str = None
+
+	def describe(self) -> str:
+		if self.error is not None:
+			return f'{self.path}: 失败 ({self.error})'
+		rate = self.megapixels / self.seconds if self.seconds else 0.
+		return f'{self.path}: {", ".join(self.outputs)} ({self.seconds:.2f} s, {rate:.1f} MP/s)'
+
+def process_image(file_path: str, config: AppConfig, output_dir: str | None, export: str, auto_grid: bool = False, low_memory: bool = False, paginate: bool = False) -> ImageResult:
+	"""处理单张图片（读图、切分并写出），异常记录在结果的error中
+
+	low_memory为True时按网格行读取条带并立即写出（见_stream_image），峰值内存约为一个网格行，不能与auto_grid同时使用。
+	paginate为True时按PDF页面比例在空白处分页（见detect_pages），忽略配置中的行/列数，不能与auto_grid、low_memory同时使用"""
+	result = ImageResult(file_path)
+	start = time.perf_counter()
+	try:
+		with trace.span('process_image', path=file_path):
+			if low_memory:
+				if auto_grid or paginate:
+					raise ValueError('低内存模式不能自动检测网格或分页（需要整张图）')
+				_stream_image(result, config, output_dir, export)
+			else:
+				_process_image(result, config, output_dir, export, auto_grid, paginate)
+	except Exception as e:
+		result.error = str(e)
+	result.seconds = time.perf_counter() - start
+	return result
+
+def _cut_image(result: ImageResult, config: AppConfig, auto_grid: bool, paginate: bool = False):
+	"""读图并按配置（或自动检测的网格、自动分页）切分，返回(格子列表, 列数)"""
+	if auto_grid and paginate:
+		raise ValueError('自动网格和自动分页不能同时使用')
+	arr = load_image(result.path)
+	height, width = arr.shape[:2]
+	result.megapixels = width * height / 1e6
+	# 由粗到细检测逐格子进行，不需要整图的灰度图和积分直方图（自动检测网格仍需要灰度图）
+	index = BorderIndex(arr) if config.cut_border and (auto_grid or not config.border_pyramid) else None
+	if auto_grid:
+		detected = detect_grid(index.gray if index is not None else arr)
+		if detected is None:
+			raise ValueError('未检测到内容')
+		rect, row_splits, col_splits = detected
+		rows, cols = len(row_splits) + 1, len(col_splits) + 1
+	elif paginate:
+		rect = _selection(config, width, height)
+		row_splits, col_splits = detect_pages(index.gray if index is not None else arr, rect, config.page_size()), None
+		rows, cols = len(row_splits) + 1, 1
+	else:
+		rect = _selection(config, width, height)
+		rows, cols, row_splits, col_splits = config.grid_rows, config.grid_cols, config.row_splits, config.col_splits
+	return split_cells(arr, rect, rows, cols, config.cut_border, index, row_splits, col_splits, config.border_pyramid), cols
+
+def _selection(config: AppConfig, width: int, height: int):
+	rect = crop_rect(selection_rect(config, width, height), width, height)
+	if rect is None:
+		raise ValueError('选区为空')
+	return rect
+
+def _stream_rows(reader: StripReader, config: AppConfig):
+	"""按配置的选区和网格逐行产出格子（见stream_cells）"""
+	rect = _selection(config, reader.width, reader.height)
+	return stream_cells(reader, rect, config.grid_rows, config.grid_cols, config.cut_border, config.row_splits, config.col_splits, config.border_pyramid)
+
+def _process_image(result: ImageResult, config: AppConfig, output_dir: str | None, export: str, auto_grid: bool, paginate: bool):
+	images, cols = _cut_image(result, config, auto_grid, paginate)
+	_write_cells(result, images, cols, config, output_dir, export)
+
+def _write_cells(result: ImageResult, images, cols: int, config: AppConfig, output_dir: str | None, export: str):
+	"""把一张图片切分出的格子编码写出（分割图片和/或PDF）"""
+	file_path = result.path
+	save_dir, base_name = _output_names(file_path, output_dir)
+	if export in ('png', 'both'):
+		saved, failures = _save(images, config, save_dir, base_name, cols)
+		_report_saved(result, config, save_dir, base_name, saved, failures)
+	if export in ('pdf', 'both'):
+		save_path = os.path.join(save_dir, base_name + '.pdf')
+		export_pdf(images, save_path, *config.page_size(), config.pdf_encoding, config.pdf_jpeg_quality, file_path, config.keep_alpha, config.pdf_single_image)
+		result.outputs.append(save_path)
+
+def _stream_image(result: ImageResult, config: AppConfig, output_dir: str | None, export: str):
+	"""低内存模式的_process_image：按网格行读取条带（见StripReader），该行的格子写出后再读取下一行
+
+	不解码整张图，PNG边解压边解码，峰值内存约为一个网格行的像素（JPEG等不能按行解码的格式除外）"""
+	file_path = result.path
+	save_dir, base_name = _output_names(file_path, output_dir)
+	with ExitStack() as stack:
+		reader = stack.enter_context(StripReader(file_path))
+		result.megapixels = reader.width * reader.height / 1e6
+		writer = None
+		if export in ('pdf', 'both'):
+			save_path = os.path.join(save_dir, base_name + '.pdf')
+			writer = stack.enter_context(PdfWriter(save_path, *config.page_size(), config.pdf_encoding, config.pdf_jpeg_quality, config.keep_alpha, config.pdf_single_image))
+		count, saved, failures = 0, 0, []
+		for images in _stream_rows(reader, config):
+			if export in ('png', 'both'):
+				row_saved, row_failures = _save(images, config, save_dir, base_name, config.grid_cols, count)
+				saved += row_saved
+				failures += row_failures
+			if writer is not None:
+				add_cells(writer, images, file_path)
+			count += len(images)
+			del images  # 读取下一行之前释放这一行的条带
+	if export in ('png', 'both'):
+		_report_saved(result, config, save_dir, base_name, saved, failures)
+	if writer is not None:
+		result.outputs.append(save_path)
+
+def _output_names(file_path: str, output_dir: str | None):
+	"""输出目录（默认与输入图片相同）和文件名前缀"""
+	return output_dir or os.path.dirname(os.path.abspath(file_path)), os.path.splitext(os.path.basename(file_path))[0]
+
+def _save(images, config: AppConfig, save_dir: str, base_name: str, cols: int, start: int = 0):
+	return save_cells(images, save_dir, base_name, cols, config.png_compression, config.png_optimize, alpha=config.keep_alpha,
+		format=config.image_format, quality=config.image_quality, effort=config.image_effort, start=start)
+
+def _report_saved(result: ImageResult, config: AppConfig, save_dir: str, base_name: str, saved: int, failures):
+	if config.image_format == 'tiff':
+		result.outputs.append(os.path.join(save_dir, base_name + IMAGE_FORMATS['tiff']) + f' ({saved}页)')
+	else:
+		result.outputs.append(f'{saved}张{config.image_format.upper()}')
+	if failures:
+		save_path, error = failures[0]
+		raise RuntimeError(f'{len(failures)}个格子保存失败，如 {save_path}: {error}')
+
+def merge_pdf(paths, config: AppConfig, save_path: str, auto_grid: bool = False, low_memory: bool = False, paginate: bool = False):
+	"""把多张原图按同一网格切分后依次写入一个PDF，按顺序逐张产出ImageResult
+
+	页面边生成边写入文件，同一时间只有一张原图（low_memory时为一个网格行）驻留内存，页数不影响峰值内存。
+	读取或切分失败的图片记录在结果的error中并跳过（low_memory时该图在出错前已写入的页面保留），写入PDF失败时抛出异常。
+	auto_grid、paginate见process_image。"""
+	with trace.span('merge_pdf', sources=len(paths)), PdfWriter(save_path, *config.page_size(), config.pdf_encoding, config.pdf_jpeg_quality, config.keep_alpha, config.pdf_single_image) as writer:
+		for path in paths:
+			result = ImageResult(path)
+			start = time.perf_counter()
+			try:
+				with trace.span('process_image', path=path):
+					if low_memory:
+						if auto_grid or paginate:
+							raise ValueError('低内存模式不能自动检测网格或分页（需要整张图）')
+						pages = 0
+						with StripReader(path) as reader:
+							result.megapixels = reader.width * reader.height / 1e6
+							for images in _stream_rows(reader, config):
+								pages += add_cells(writer, images, path)
+								del images
+					else:
+						images, _ = _cut_image(result, config, auto_grid, paginate)
+			except Exception as e:
+				result.error = str(e)
+			else:
+				if not low_memory:
+					pages = add_cells(writer, images, path)
+					del images
+				result.outputs.append(f'{pages}页')
+			result.seconds = time.perf_counter() - start
+			yield result
+
+def _cut_ahead(paths, config: AppConfig, auto_grid: bool, paginate: bool):
+	"""在后台线程中依次读图并切分（解码、检测边框），按顺序产出(ImageResult, 格子列表, 列数)，失败时格子列表为None
+
+	两级之间的队列只容纳一张图片：调用方编码写出第N张时第N+1张已在解码，同时驻留内存的原图不超过3张。
+	提前关闭生成器时，后台线程切分完当前图片后结束"""
+	stage = queue.Queue(maxsize=1)
+	stop = threading.Event()
+
+	def cut():
+		try:
+			for path in paths:
+				if stop.is_set():
+					break
+				result = ImageResult(path)
+				start = time.perf_counter()
+				images = cols = None
+				try:
+					images, cols = _cut_image(result, config, auto_grid, paginate)
+				except Exception as e:
+					result.error = str(e)
+				result.seconds = time.perf_counter() - start
+				stage.put((result, images, cols))
+				del images
+		finally:
+			stage.put(None)
+
+	thread = threading.Thread(target=cut, name='imgrid-cut', daemon=True)
+	thread.start()
+	try:
+		while True:
+			item = stage.get()
+			if item is None:
+				break
+			yield item
+			item = None  # 等待下一张时不再引用这一张的格子
+	finally:
+		stop.set()
+		while thread.is_alive():
+			try:
+				stage.get(timeout=0.05)
+			except queue.Empty:
+				pass
+
+def run_batch(paths, config: AppConfig, output_dir: str | None = None, export: str = 'png', auto_grid: bool = False, workers: int = None, low_memory: bool = False, paginate: bool = False):
+	"""处理多张图片，按完成顺序逐张产出ImageResult
+
+	workers>1时每个工作进程完整处理一张图片，workers张图片同时在不同阶段上推进：一张在编码写出时，
+	另一张已在解码和检测边框。进程之间不按阶段传递格子（格子是原图上的视图，跨进程传递要复制整张图），
+	并行只在图片之间。已提交未完成的任务不超过2×workers个，整批图片的解码结果不会同时驻留内存。
+	workers<=1时在当前进程中按两级流水线处理（见_cut_ahead）：后台线程解码并检测边框，当前线程编码写出。
+	开启计时（trace需要在同一线程中汇总每张图的process_image）或low_memory（已按网格行边读边写）时依次处理。
+	提前关闭生成器会取消尚未开始的任务。"""
+	paths = list(paths)
+	workers = min(workers or os.cpu_count() or 1, len(paths))
+	if output_dir:
+		os.makedirs(output_dir, exist_ok=True)
+	if trace.enabled() or (workers <= 1 and low_memory):
+		for path in paths:
+			yield process_image(path, config, output_dir, export, auto_grid, low_memory, paginate)
+		return
+	if workers <= 1:
+		for result, images, cols in _cut_ahead(paths, config, auto_grid, paginate):
+			if images is not None:
+				start = time.perf_counter()
+				try:
+					_write_cells(result, images, cols, config, output_dir, export)
+				except Exception as e:
+					result.error = str(e)
+				result.seconds += time.perf_counter() - start
+			del images
+			yield result
+		return
+
+	# 界面进程中有Qt线程，fork不安全，统一使用spawn
+	context = multiprocessing.get_context('spawn')
+	queue = iter(paths)
+	pending = {}
+	with ProcessPoolExecutor(workers, mp_context=context) as executor:
+		def submit():
+			path = next(queue, None)
+			if path is not None:
+				pending[executor.submit(process_image, path, config, output_dir, export, auto_grid, low_memory, paginate)] = path
+
+		try:
+			for _ in range(2 * workers):
+				submit()
+			while pending:
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					path = pending.pop(future)
+					submit()
+					try:
+						yield future.result()
+					except Exception as e:  # 工作进程异常退出等，process_image本身不抛出
+						yield ImageResult(path, error=str(e) or type(e).__name__)
+		finally:
+			for future in pending:
+				future.cancel()
+
+def summarize(results: list, seconds: float) -> str:
+	"""整批的吞吐量摘要，如 '12张图片（失败0张），共96.0 MP，用时8.1 s，1.48 张/s，11.9 MP/s'"""
+	failed = sum(result.error is not None for result in results)
+	megapixels = sum(result.megapixels for result in results)
+	seconds = max(seconds, 1e-9)
+	return (f'{len(results)}张图片（失败{failed}张），共{megapixels:.1f} MP，用时{seconds:.1f} s，'
+		f'{len(results) / seconds:.2f} 张/s，{megapixels / seconds:.1f} MP/s')
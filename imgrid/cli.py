@@ -0,0 +1,128 @@
+"""命令行入口：python -m imgrid 图片... [选项]"""
+import sys
+import time
+import argparse
+from . import trace
+from .batch import EXPORT_TYPES, run_batch, merge_pdf, summarize
+from .core import AppConfig, PNG_COMPRESSION, IMAGE_FORMATS, ENCODE_EFFORT, PDF_PRESETS, PDF_CUSTOM_PRESET, PDF_ENCODINGS
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(
+		prog='python -m imgrid',
+		description='按网格切分图片并导出PNG或PDF（无界面模式，不带参数运行则启动图形界面）'
+	)
+	parser.add_argument('images', nargs='+', help='输入图片')
+	parser.add_argument('-o', '--output-dir', help='输出目录（默认与输入图片相同）')
+	parser.add_argument('--config', default='config.json', help='读取默认参数的配置文件（默认config.json）')
+	parser.add_argument('--export', choices=EXPORT_TYPES, default='png', help='导出类型：png为分割图片（格式见--format），默认png')
+	parser.add_argument('--merge-pdf', metavar='PATH', help='把所有输入图片的格子依次写入一个PDF（忽略--export）')
+	parser.add_argument('--selection', nargs=4, type=float, metavar=('X', 'Y', 'W', 'H'), help='归一化选区')
+	parser.add_argument('--rows', type=int, help='行数')
+	parser.add_argument('--cols', type=int, help='列数')
+	parser.add_argument('--auto-grid', action='store_true', help='按背景分隔带为每张图自动检测选区和网格（忽略--selection/--rows/--cols）')
+	parser.add_argument('--paginate', action='store_true',
+		help='按PDF页面比例（--pdf-preset等）把选区分为单列的若干页，切分尽量落在空白处（适合长截图，忽略--rows/--cols）')
+	parser.add_argument('--cut-border', action=argparse.BooleanOptionalAction, default=None, help='裁剪边框')
+	parser.add_argument('--border-pyramid', action=argparse.BooleanOptionalAction, default=None,
+		help='大格子先在缩小图上求阈值和粗略边框再在原分辨率下细化（更快，与精确检测相差不超过1像素）')
+	parser.add_argument('--format', choices=tuple(IMAGE_FORMATS), help='分割图片的格式（tiff为一个多页文件）')
+	parser.add_argument('--quality', type=int, help='jpeg/webp/avif的编码质量（1-100）')
+	parser.add_argument('--effort', choices=tuple(ENCODE_EFFORT['webp']), help='非PNG格式的编码档位（fast更快，max文件更小）')
+	parser.add_argument('--png-compression', choices=tuple(PNG_COMPRESSION), help='PNG压缩档位')
+	parser.add_argument('--png-optimize', action=argparse.BooleanOptionalAction, default=None, help='PNG优化（更慢，文件更小）')
+	parser.add_argument('--alpha', action=argparse.BooleanOptionalAction, default=None, help='导出PNG/PDF时保留透明通道')
+	parser.add_argument('--pdf-preset', choices=(*PDF_PRESETS, PDF_CUSTOM_PRESET), help='PDF页面预设')
+	parser.add_argument('--pdf-width', type=float, help='自定义PDF宽度（cm）')
+	parser.add_argument('--pdf-height', type=float, help='自定义PDF高度（cm）')
+	parser.add_argument('--pdf-encoding', choices=PDF_ENCODINGS, help='PDF中图片的编码（flate无损，jpeg适合照片）')
+	parser.add_argument('--pdf-jpeg-quality', type=int, help='PDF JPEG编码质量（1-95）')
+	parser.add_argument('--pdf-single-image', action=argparse.BooleanOptionalAction, default=None,
+		help='未裁边时原图只嵌入一次，各页裁剪显示（文件更小、导出更快，阅读器每页需解码整张图）')
+	parser.add_argument('--trace', nargs='?', const=trace.DEFAULT_PATH, metavar='PATH',
+		help=f'记录各阶段耗时并写出Chrome trace JSON（默认{trace.DEFAULT_PATH}，也可设置环境变量IMGRID_TRACE）')
+	parser.add_argument('--low-memory', action='store_true',
+		help='按网格行流式读取和写出，峰值内存约为一个网格行而不是整张图（PNG、未压缩TIFF/BMP；不能与--auto-grid、--paginate同时使用）')
+	parser.add_argument('-j', '--workers', type=int, help='并行处理图片的进程数（默认CPU核数，1为单进程；开启--trace时为单进程）')
+	return parser
+
+def config_from_args(args) -> AppConfig:
+	"""以配置文件为默认值，用命令行参数覆盖"""
+	config = AppConfig.load(args.config)
+	if args.selection:
+		(config.selection_x_normalized, config.selection_y_normalized,
+		 config.selection_w_normalized, config.selection_h_normalized) = args.selection
+	if args.rows is not None:
+		config.grid_rows = args.rows
+	if args.cols is not None:
+		config.grid_cols = args.cols
+	# 命令行给出选区或网格时均分，配置文件中保存的非均匀切分属于原来的选区和网格
+	if args.selection or args.rows is not None or args.cols is not None:
+		config.row_splits = config.col_splits = None
+	if args.cut_border is not None:
+		config.cut_border = args.cut_border
+	if args.border_pyramid is not None:
+		config.border_pyramid = args.border_pyramid
+	if args.format is not None:
+		config.image_format = args.format
+	if args.quality is not None:
+		config.image_quality = args.quality
+	if args.effort is not None:
+		config.image_effort = args.effort
+	if args.png_compression is not None:
+		config.png_compression = args.png_compression
+	if args.png_optimize is not None:
+		config.png_optimize = args.png_optimize
+	if args.alpha is not None:
+		config.keep_alpha = args.alpha
+	if args.pdf_preset is not None:
+		config.pdf_preset = args.pdf_preset
+	if config.pdf_preset in PDF_PRESETS:
+		config.pdf_width_spin, config.pdf_height_spin = PDF_PRESETS[config.pdf_preset]
+	if args.pdf_width is not None:
+		config.pdf_width_spin = args.pdf_width
+	if args.pdf_height is not None:
+		config.pdf_height_spin = args.pdf_height
+	if args.pdf_encoding is not None:
+		config.pdf_encoding = args.pdf_encoding
+	if args.pdf_jpeg_quality is not None:
+		config.pdf_jpeg_quality = args.pdf_jpeg_quality
+	if args.pdf_single_image is not None:
+		config.pdf_single_image = args.pdf_single_image
+	return config
+
+def main(argv=None) -> int:
+	args = build_parser().parse_args(argv)
+	if args.trace:
+		trace.enable(args.trace)
+	config = config_from_args(args)
+	if config.grid_rows < 1 or config.grid_cols < 1:
+		print('错误: 行数和列数必须大于0', file=sys.stderr)
+		return 2
+	if args.auto_grid and args.paginate:
+		print('错误: --auto-grid不能与--paginate同时使用', file=sys.stderr)
+		return 2
+	if args.low_memory and (args.auto_grid or args.paginate):
+		print('错误: --low-memory不能与--auto-grid或--paginate同时使用（自动网格和分页需要整张图）', file=sys.stderr)
+		return 2
+
+	results = []
+	start = time.perf_counter()
+	if args.merge_pdf:
+		results_iter = merge_pdf(args.images, config, args.merge_pdf, args.auto_grid, args.low_memory, args.paginate)
+	else:
+		results_iter = run_batch(args.images, config, args.output_dir, args.export, args.auto_grid, args.workers, args.low_memory, args.paginate)
+	try:
+		for result in results_iter:
+			results.append(result)
+			print(result.describe(), file=sys.stderr if result.error is not None else sys.stdout, flush=True)
+			record = trace.last('process_image')
+			if record is not None:
+				print(trace.describe(record), file=sys.stderr)
+	except Exception as e:  # 合并PDF写入失败
+		print(f'错误: {e}', file=sys.stderr)
+		return 1
+	if args.merge_pdf:
+		print(f'{args.merge_pdf}: {summarize(results, time.perf_counter() - start)}')
+	elif len(results) > 1:
+		print(summarize(results, time.perf_counter() - start))
+	return 1 if any(result.error is not None for result in results) else 0
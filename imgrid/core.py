@@ -0,0 +1,1492 @@
+"""无界面的切图核心：网格计算、边框裁剪、PNG与PDF导出（不依赖Qt）"""
+import os
+import io
+import json
+import math
+import zlib
+import struct
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+import numpy as np
+from . import trace
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff')
+
+# 1 cm对应的PDF point数
+CM = 72 / 2.54
+
+# PDF页面预设（单位cm）
+PDF_PRESETS = {
+	'A4': (21.0, 29.7),
+	'Letter': (21.59, 27.94),
+	'16:9': (33.867, 19.05),
+	'4:3': (25.4, 19.05),
+}
+PDF_CUSTOM_PRESET = '自定义'
+
+# PNG压缩档位对应的zlib压缩级别
+PNG_COMPRESSION = {
+	'fast': 1,
+	'default': 6,
+	'max': 9,
+}
+
+# 分割图片的输出格式 -> 扩展名；tiff把全部格子写入一个多页TIFF
+IMAGE_FORMATS = {
+	'png': '.png',
+	'jpeg': '.jpg',
+	'webp': '.webp',
+	'avif': '.avif',
+	'tiff': '.tif',
+}
+LOSSY_FORMATS = ('jpeg', 'webp', 'avif')  # 按质量参数有损编码的格式
+
+# 非PNG格式的编码档位（与PNG_COMPRESSION相同的fast/default/max）对应的Pillow保存参数
+ENCODE_EFFORT = {
+	'jpeg': {'fast': {}, 'default': {}, 'max': {'optimize': True}},
+	'webp': {'fast': {'method': 0}, 'default': {'method': 4}, 'max': {'method': 6}},
+	'avif': {'fast': {'speed': 10}, 'default': {'speed': 8}, 'max': {'speed': 4}},
+	'tiff': {'fast': {'compression': 'packbits'}, 'default': {'compression': 'tiff_lzw'}, 'max': {'compression': 'tiff_adobe_deflate'}},
+}
+
+# PDF中图片的编码方式：flate为无损，jpeg适合照片类内容
+PDF_ENCODINGS = ('flate', 'jpeg')
+
+# 边距扫描的初始块大小（行/列数）
+_SCAN_BLOCK = 16
+_DIRECT_SCAN_AREA = 256 * 256  # 小于此面积时不分块，直接整体求行/列最值
+PYRAMID_AREA = 2048 * 2048  # 开启由粗到细检测时，不少于此面积的格子才使用（见detect_border_pyramid）
+PYRAMID_FACTOR = 8  # 粗检测的缩小倍数（2的幂）
+
+PREVIEW_SIZE = 1024  # 缓存的预览图最长边不超过此值
+_HASH_STRIP = 16 * 1024 * 1024  # 内容哈希时每个条带的字节数
+
+PAGE_SLACK = 0.2  # 自动分页时每页可比理想高度短的比例（见detect_pages）
+_CUT_MARGIN = 2  # 分页切分线上下各这么多行都没有墨迹才算落在空白处
+_PROFILE_ROWS = 1024  # 计算行墨迹密度时每个条带的行数
+
+_FLT_EPSILON = float(np.finfo(np.float32).eps)
+
+@dataclass
+class AppConfig:
+	"""应用程序配置类"""
+	window_width: int = 1000
+	window_height: int = 700
+	selection_x_normalized: float = 0.1  # 框相对图片的xywh
+	selection_y_normalized: float = 0.1
+	selection_w_normalized: float = 0.8
+	selection_h_normalized: float = 0.8
+	image_scale: float = 1.  # 默认填满当前区域大小前提下进行的缩放倍数
+	# image_translation_x_normalized: float = 0.  # 相对平移
+	# image_translation_y_normalized: float = 0.  # 相对平移
+	grid_rows: int = 3
+	grid_cols: int = 3
+	row_splits: list = None  # 非均匀网格：选区内归一化的内部切分位置（grid_rows-1个），None为均分
+	col_splits: list = None
+	cut_border: bool = False
+	border_pyramid: bool = False  # 大格子在缩小图上粗检测边框再在原分辨率下细化（与精确检测相差不超过1像素）
+	preview_mode: bool = False
+	pdf_preset: str = 'A4'
+	pdf_width_spin: float = 21.0  # 默认A4宽度
+	pdf_height_spin: float = 29.7  # 默认A4高度
+	png_compression: str = 'default'  # PNG_COMPRESSION中的档位
+	png_optimize: bool = False
+	image_format: str = 'png'  # IMAGE_FORMATS之一
+	image_quality: int = 90  # LOSSY_FORMATS的编码质量（1-100）
+	image_effort: str = 'default'  # 非PNG格式的ENCODE_EFFORT档位
+	pdf_encoding: str = 'flate'  # PDF_ENCODINGS之一
+	pdf_jpeg_quality: int = 90
+	keep_alpha: bool = False  # 导出PNG/PDF时保留透明通道
+	pdf_single_image: bool = False  # 未裁边时原图只嵌入一次，各页裁剪显示（文件更小，但阅读器每页都要解码整张图）
+	cache_dir: str = '.imgrid_cache'  # 按图片内容保存选区、网格、边框和预览图的缓存目录，空字符串为不缓存
+	cache_size_mb: int = 256  # 缓存目录的大小上限，超出时淘汰最久未使用的图片
+	@classmethod
+	def load(cls, filename="config.json"):
+		"""从文件加载配置"""
+		try:
+			if os.path.exists(filename):
+				with open(filename, 'r') as f:
+					data = json.load(f)
+				return cls(**data)
+		except:
+			pass
+		return cls()
+
+	def save(self, filename="config.json"):
+		"""保存配置到文件"""
+		try:
+			with open(filename, 'w') as f:
+				json.dump({
+					'window_width': self.window_width,
+					'window_height': self.window_height,
+					'selection_x_normalized': self.selection_x_normalized,
+					'selection_y_normalized': self.selection_y_normalized,
+					'selection_w_normalized': self.selection_w_normalized,
+					'selection_h_normalized': self.selection_h_normalized,
+					'image_scale': self.image_scale,
+					# 'image_translation_x_normalized': self.image_translation_x_normalized,
+					# 'image_translation_y_normalized': self.image_translation_y_normalized,
+					'grid_rows': self.grid_rows,
+					'grid_cols': self.grid_cols,
+					'row_splits': self.row_splits,
+					'col_splits': self.col_splits,
+					'cut_border': self.cut_border,
+					'border_pyramid': self.border_pyramid,
+					'preview_mode': self.preview_mode,
+					'pdf_preset': self.pdf_preset,
+					'pdf_width_spin': self.pdf_width_spin,
+					'pdf_height_spin': self.pdf_height_spin,
+					'png_compression': self.png_compression,
+					'png_optimize': self.png_optimize,
+					'image_format': self.image_format,
+					'image_quality': self.image_quality,
+					'image_effort': self.image_effort,
+					'pdf_encoding': self.pdf_encoding,
+					'pdf_jpeg_quality': self.pdf_jpeg_quality,
+					'keep_alpha': self.keep_alpha,
+					'pdf_single_image': self.pdf_single_image,
+					'cache_dir': self.cache_dir,
+					'cache_size_mb': self.cache_size_mb,
+				}, f, indent=2)
+		except:
+			pass
+
+	def page_size(self):
+		"""PDF页面尺寸（单位point）"""
+		return self.pdf_width_spin * CM, self.pdf_height_spin * CM
+
+# cv2和PIL导入较慢，且只在检测边框、读写图片文件时需要，推迟到首次使用时导入（界面启动后由preload在后台提前导入）
+def _cv2():
+	import cv2
+	return cv2
+
+_rgbx_formats = None  # 可以把RGBX直接写为RGB的格式（见_patch_rgbx），首次导入PIL时确定
+
+def _pil():
+	from PIL import Image
+	# 超长截图超过PIL默认的像素上限（会被当作解压炸弹拒绝），与界面的QImageReader.setAllocationLimit(0)一致
+	Image.MAX_IMAGE_PIXELS = None
+	if _rgbx_formats is None:
+		_patch_rgbx()
+	return Image
+
+def _patch_rgbx():
+	"""让PNG/TIFF编码器把RGBX（忽略第4字节）直接写为RGB，cell_image映射的RGBA缓冲区因此不必先转换为RGB
+	（TIFF默认会把RGBX写成带一个未定义附加通道的4通道图）
+
+	修改的是Pillow的私有表，只在表存在且格式符合预期时修改；否则该格式由cell_image先转换为RGB，读图不受影响"""
+	global _rgbx_formats
+	from PIL import PngImagePlugin, TiffImagePlugin
+	formats = set()
+	for format, table in (('png', getattr(PngImagePlugin, '_OUTMODES', None)), ('tiff', getattr(TiffImagePlugin, 'SAVE_INFO', None))):
+		if isinstance(table, dict) and 'RGB' in table:
+			table.setdefault('RGBX', table['RGB'])
+			formats.add(format)
+	_rgbx_formats = frozenset(formats)
+
+def preload():
+	"""在后台线程中导入cv2和PIL（含全部格式插件），使首次检测边框、导出时不必等待导入"""
+	def run():
+		_cv2()
+		_pil().init()
+	threading.Thread(target=run, name='preload', daemon=True).start()
+
+def load_image(file_path: str) -> np.ndarray:
+	"""读取图片为(h, w, 4)的RGBA数组（不透明图片alpha为255），与界面的像素布局一致"""
+	Image = _pil()
+	with trace.span('decode', path=file_path), Image.open(file_path) as img:
+		if img.mode not in ('RGB', 'RGBA'):
+			img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+		return np.frombuffer(img.tobytes('raw', 'RGBA'), np.uint8).reshape(img.height, img.width, 4)
+
+class StripReader:
+	"""按水平条带读取图片文件为RGBA数组（与load_image的像素相同），不把整张图解码到内存
+
+	非隔行的8位灰度/RGB(A) PNG（截图的常见格式）边解压边解码：IDAT数据流式解压，每个条带的滤波数据
+	连同上一条带的最后一行（PNG行滤波的参照）交给Pillow的zip解码器反滤波，内存中只有一个条带，
+	因此这类PNG的条带只能从上到下依次读取。像素按行未压缩存放的文件（未压缩的TIFF、BMP等）按偏移直接读取条带所在的行，
+	条带可以任意读取（不用np.memmap：映射读过的页面会一直计入常驻内存，直到整个文件都驻留）。其他格式（JPEG、压缩的TIFF等）不能按行解码，退回为用load_image解码整张图。"""
+	STRIP_ROWS = 256  # 跳过选区上方的行时每次解码的行数
+	_PNG_MODES = {0: 'L', 2: 'RGB', 4: 'LA', 6: 'RGBA'}  # PNG颜色类型 -> 模式
+	_RAW_CHANNELS = {'RGB': 'RGB', 'RGBX': 'RGB', 'RGBA': 'RGBA', 'BGR': 'BGR', 'BGRX': 'BGR', 'BGRA': 'BGRA', 'L': 'L'}  # 原始模式 -> 有效通道
+
+	def __init__(self, file_path: str):
+		self.path = file_path
+		self._file = None
+		self._offset = self._stride = None  # 未压缩像素的文件偏移和行跨度
+		self._array = None  # 整图解码时的RGBA数组
+		Image = _pil()
+		with Image.open(file_path) as img:
+			self.width, self.height = img.size
+			tile = img.tile[0] if len(img.tile) == 1 else None
+			transparency = 'transparency' in img.info
+			if img.format == 'PNG' and not transparency and self._open_png():
+				self.kind = 'png'
+			elif tile is not None and tile[0] == 'raw' and tile[1] == (0, 0, *img.size) and not transparency and self._map_raw(img.mode, tile):
+				self.kind = 'raw'
+			else:
+				self.kind = 'full'
+		if self.kind == 'full':
+			self._array = load_image(file_path)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+		self._array = None
+
+	def _open_png(self) -> bool:
+		"""读取IHDR并定位到第一个IDAT之前；不是可以逐行解码的PNG时返回False"""
+		f = open(self.path, 'rb')
+		try:
+			f.seek(8)
+			length, chunk_type = struct.unpack('>I4s', f.read(8))
+			width, height, depth, color, _, _, interlace = struct.unpack('>IIBBBBB', f.read(13))
+			f.seek(length - 13 + 4, 1)
+		except struct.error:  # 文件截断
+			f.close()
+			return False
+		mode = self._PNG_MODES.get(color)
+		if chunk_type != b'IHDR' or length != 13 or depth != 8 or interlace or mode is None:
+			f.close()
+			return False
+		self._file = f
+		self._mode = mode
+		self._row_bytes = width * len(mode)
+		self._row = 0  # 下一个待解码的行
+		self._previous = None  # 上一行反滤波后的像素（PNG格式），作为下一条带的滤波参照
+		self._inflate = zlib.decompressobj()
+		self._filtered = bytearray()
+		self._chunks = self._idat()
+		return True
+
+	def _idat(self):
+		"""依次产出IDAT的压缩数据（大的数据块分段读取）"""
+		f = self._file
+		while True:
+			header = f.read(8)
+			if len(header) < 8:
+				return
+			length, chunk_type = struct.unpack('>I4s', header)
+			if chunk_type == b'IEND':
+				return
+			if chunk_type != b'IDAT':
+				f.seek(length + 4, 1)
+				continue
+			while length > 0:
+				data = f.read(min(length, PdfWriter.STRIP_BYTES))
+				if not data:
+					return
+				length -= len(data)
+				yield data
+			f.seek(4, 1)  # CRC
+
+	def _decode_png(self, count: int) -> np.ndarray:
+		"""解码接下来的count行，返回(count, 宽, 4)的RGBA数组"""
+		if count <= 0:
+			return np.empty((0, self.width, 4), np.uint8)
+		need = count * (1 + self._row_bytes)
+		while len(self._filtered) < need:
+			data = self._inflate.unconsumed_tail or next(self._chunks, None)
+			if data is None:
+				raise ValueError(f'PNG数据不完整: {self.path}')
+			self._filtered += self._inflate.decompress(data, need - len(self._filtered))
+		data = self._filtered[:need]
+		del self._filtered[:need]
+		if self._previous is not None:
+			data[:0] = b'\0' + self._previous  # 滤波类型0（无滤波）的参照行，解码后丢弃
+		Image = _pil()
+		rows = count + (self._previous is not None)
+		img = Image.frombytes(self._mode, (self.width, rows), zlib.compress(data, 0), 'zip', self._mode)
+		self._previous = img.crop((0, rows - 1, self.width, rows)).tobytes()
+		self._row += count
+		if img.mode not in ('RGB', 'RGBA'):
+			img = img.convert('RGBA')
+		return np.frombuffer(img.tobytes('raw', 'RGBA'), np.uint8).reshape(rows, self.width, 4)[rows - count:]
+
+	def _map_raw(self, mode: str, tile) -> bool:
+		"""按Pillow给出的原始布局映射像素，不支持的布局返回False"""
+		args = tile[3] if isinstance(tile[3], tuple) else (tile[3],)
+		rawmode, stride, ystep = (*args, 0, 1)[:3]
+		channels = self._RAW_CHANNELS.get(rawmode)
+		if channels is None or mode not in ('RGB', 'RGBA', 'L') or (mode == 'RGBA') != channels.endswith('A'):
+			return False
+		self._rawmode, self._channels, self._ystep = rawmode, channels, ystep
+		self._offset, self._stride = tile[2], stride or self.width * len(rawmode)
+		self._file = open(self.path, 'rb')
+		return True
+
+	def _read_raw(self, top: int, bottom: int) -> np.ndarray:
+		first = top if self._ystep > 0 else self.height - bottom  # 自下而上存放（如BMP）时文件中的第一行
+		rows = np.empty((bottom - top, self._stride), np.uint8)
+		self._file.seek(self._offset + first * self._stride)
+		if self._file.readinto(rows) != rows.size:
+			raise ValueError(f'图片数据不完整: {self.path}')
+		if self._ystep < 0:
+			rows = rows[::-1]
+		pixels = rows[:, :self.width * len(self._rawmode)].reshape(bottom - top, self.width, len(self._rawmode))
+		strip = np.empty((bottom - top, self.width, 4), np.uint8)
+		if self._channels == 'L':
+			strip[..., :3] = pixels[..., :1]
+		else:
+			order = [self._channels.index(channel) for channel in 'RGB']
+			strip[..., :3] = pixels[..., order]
+		strip[..., 3] = pixels[..., self._channels.index('A')] if self._channels.endswith('A') else 255
+		return strip
+
+	def read(self, top: int, bottom: int) -> np.ndarray:
+		"""返回第top到bottom（不含）行的(h, w, 4) RGBA数组"""
+		top, bottom = max(top, 0), min(bottom, self.height)
+		with trace.span('read_strip', rows=bottom - top):
+			if self.kind == 'full':
+				return self._array[top:bottom]
+			if self.kind == 'raw':
+				return self._read_raw(top, max(bottom, top))
+			if top < self._row:
+				raise ValueError('PNG只能从上到下依次读取条带')
+			while self._row < top:  # 选区上方的行也要解码：下一行的滤波以上一行为参照
+				self._decode_png(min(top - self._row, self.STRIP_ROWS))
+			return self._decode_png(bottom - top)
+
+def cell_image(cell_arr: np.ndarray, alpha: bool = False, format: str = None):
+	"""把格子包装为PIL图片交给编码器
+
+	RGBA数组的视图（包括整图中的子区域）直接映射为共享内存的RGBA或RGBX（忽略alpha）图片，不复制像素；
+	其他数组（如RGB）由Image.fromarray复制。format为要写出的PNG/TIFF而Pillow不能直接写RGBX时（见_patch_rgbx）
+	转换为RGB（复制一次格子）"""
+	Image = _pil()
+	if not (cell_arr.ndim == 3 and cell_arr.shape[2] == 4 and cell_arr.dtype == np.uint8 and cell_arr.strides[1:] == (4, 1) and cell_arr.strides[0] > 0 and cell_arr.size):
+		return Image.fromarray(cell_arr)
+	height, width = cell_arr.shape[:2]
+	mode = 'RGBA' if alpha else 'RGBX'
+	# Pillow要求缓冲区覆盖完整的height行，但每行只读取width*4字节，最后一行按行跨度延长的部分不会被访问
+	buffer = np.lib.stride_tricks.as_strided(cell_arr, (height * cell_arr.strides[0],), (1,), writeable=False)
+	img = Image.frombuffer(mode, (width, height), buffer, 'raw', mode, cell_arr.strides[0], 1)
+	if mode == 'RGBX' and format in ('png', 'tiff') and format not in _rgbx_formats:
+		return img.convert('RGB')
+	return img
+
+def selection_rect(config: AppConfig, width: int, height: int):
+	"""由归一化选区计算图片坐标下的选区(x, y, w, h)"""
+	x = width * config.selection_x_normalized
+	y = height * config.selection_y_normalized
+	w = width * config.selection_w_normalized
+	h = height * config.selection_h_normalized
+	# 与图片求交
+	x1, y1 = max(x, 0), max(y, 0)
+	x2, y2 = min(x + w, width), min(y + h, height)
+	if x2 - x1 < 10 or y2 - y1 < 10:
+		return width * 0.1, height * 0.1, width * 0.8, height * 0.8
+	return x1, y1, x2 - x1, y2 - y1
+
+def crop_rect(rect, width: int, height: int):
+	"""将浮点选区取整并限制在图片范围内，返回(x, y, w, h)，为空时返回None"""
+	x, y, w, h = (round(v) for v in rect)
+	x1, y1 = max(x, 0), max(y, 0)
+	x2, y2 = min(x + w, width), min(y + h, height)
+	if x2 <= x1 or y2 <= y1:
+		return None
+	return x1, y1, x2 - x1, y2 - y1
+
+def valid_splits(splits, count: int):
+	"""splits可用于count格（恰有count-1个切分位置）时返回True"""
+	return splits is not None and len(splits) == count - 1 and count > 1
+
+def grid_edges(start: float, length: float, count: int, splits=None):
+	"""一个方向上count格的count+1条边（浮点），splits有效时按其非均匀切分，否则均分"""
+	if valid_splits(splits, count):
+		return [start] + [start + length * split for split in splits] + [start + length]
+	return [start + length * i / count for i in range(count)] + [start + length]
+
+def _int_edges(start: int, length: int, count: int, splits=None):
+	"""grid_cells使用的整数边；均分时每格length // count"""
+	if valid_splits(splits, count):
+		edges = [start] + [start + round(length * split) for split in splits]
+	else:
+		step = length // count
+		edges = [start + i * step for i in range(count)]
+	# 最后一行/列延伸到right/bottom（与QRect.right()一致，不含最后一个像素）
+	return edges + [start + length - 1]
+
+def grid_cells(rect, rows: int, cols: int, row_splits=None, col_splits=None):
+	"""按行优先顺序返回每个格子的整数区域(x, y, w, h)，row_splits/col_splits见AppConfig"""
+	left, top, width, height = rect
+	xs = _int_edges(left, width, cols, col_splits)
+	ys = _int_edges(top, height, rows, row_splits)
+
+	cells = []
+	for row in range(rows):
+		for col in range(cols):
+			cells.append((xs[col], ys[row], xs[col + 1] - xs[col], ys[row + 1] - ys[row]))
+	return cells
+
+def to_gray(img_array):
+	"""转换为灰度图（支持RGB、RGBA视图和灰度图）"""
+	cv2 = _cv2()
+	if len(img_array.shape) == 3 and img_array.shape[2] == 4:
+		return cv2.cvtColor(img_array, cv2.COLOR_RGBA2GRAY)  # 直接读取RGBA视图，无需先复制出RGB
+	elif len(img_array.shape) == 3:
+		return cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+	return img_array
+
+def detect_border_with_otsu(img_array, pyramid: bool = False):
+	"""使用Otsu方法检测并返回边框裁剪区域
+
+	pyramid为True时面积不小于PYRAMID_AREA的格子由粗到细检测（见detect_border_pyramid）"""
+	if pyramid and img_array.shape[0] * img_array.shape[1] >= PYRAMID_AREA:
+		return detect_border_pyramid(img_array)
+	gray = to_gray(img_array)
+	cv2 = _cv2()
+
+	# Apply Otsu's thresholding
+	_, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+	# Get border values (should be same at both ends)
+	return _crop_bounds(binary, binary[0, 0], binary[-1, -1])
+
+def detect_border_pyramid(img_array, factor: int = PYRAMID_FACTOR):
+	"""由粗到细的边框检测，边界与detect_border_with_otsu相差不超过1像素（边距为大块均匀背景时）
+
+	先逐次按2倍INTER_AREA缩小（factor为2的幂；cv2对恰好2倍的面积插值有快速路径，比一次缩小factor倍快），
+	在缩小图上求Otsu阈值和粗略边界，再只在每条粗边界前后各一个缩小像素（factor条线）的条带内于原分辨率下定位。
+	面积平均不会产生取样那样的混叠，阈值与原分辨率的相差很小；但比factor细且对比度低的线可能在缩小时被平均掉，
+	因此只在由粗到细检测开启时（--border-pyramid）用于大格子。缩小图中没有内容时退回精确检测"""
+	height, width = img_array.shape[:2]
+	if height < 2 * factor or width < 2 * factor:
+		return detect_border_with_otsu(img_array)
+	cv2 = _cv2()
+	with trace.span('pyramid_resize'):
+		small = img_array
+		for _ in range(factor.bit_length() - 1):
+			half_height, half_width = small.shape[0] // 2, small.shape[1] // 2
+			small = cv2.resize(small[:half_height * 2, :half_width * 2], (half_width, half_height), interpolation=cv2.INTER_AREA)
+		small = to_gray(small)
+	threshold = otsu_threshold(_bincount(small))
+	# 与detect_border_with_otsu相同，上/左边取左上角的值，下/右边取右下角的值
+	top_val, bottom_val = to_gray(img_array[:1, :1])[0, 0] > threshold, to_gray(img_array[-1:, -1:])[0, 0] > threshold
+	hints = _crop_bounds(small, top_val, bottom_val, threshold)
+	if hints == (0, small.shape[0], 0, small.shape[1]) and _first_mismatch(small, top_val, threshold) is None:
+		return detect_border_with_otsu(img_array)
+
+	with trace.span('pyramid_refine'):
+		top, bottom = _refine_bounds(img_array, 0, hints[0], hints[1], top_val, bottom_val, threshold, factor)
+		# 四边的边框值相同时，内容之外的行全是边框值，左右边界只需检查内容所在的行
+		rows = img_array[top:bottom] if top_val == bottom_val else img_array
+		left, right = _refine_bounds(rows, 1, hints[2], hints[3], top_val, bottom_val, threshold, factor)
+	return top, bottom, left, right
+
+def _refine_bounds(img_array, axis: int, first: int, end: int, first_val, end_val, threshold: int, factor: int):
+	"""由缩小图中的粗边界[first, end)求原分辨率下的边界：只检查粗边界前后各factor条行(axis=0)或列(axis=1)
+
+	缩小时舍去的最后不足factor条线与最后一个缩小像素一起检查；条带内没有找到时取粗边界"""
+	count = img_array.shape[axis]
+	covered = count // factor * factor
+	low, high = max(0, (first - 1) * factor), min(count, (first + 1) * factor)
+	start = _mismatch_in(img_array, axis, low, high, first_val, threshold, False)
+	low = max(0, (end - 2) * factor)
+	high = count if (end + 1) * factor >= covered else (end + 1) * factor
+	stop = _mismatch_in(img_array, axis, low, high, end_val, threshold, True)
+	start = first * factor if start is None else start
+	stop = (count if end * factor >= covered else end * factor) if stop is None else stop + 1
+	return start, stop
+
+def _mismatch_in(img_array, axis: int, low: int, high: int, value, threshold: int, reverse: bool):
+	"""[low, high)内第一条（reverse时为最后一条）不全为value的行/列的下标，没有则返回None；只转换这一条带为灰度"""
+	gray = to_gray(img_array[low:high] if axis == 0 else img_array[:, low:high])
+	if axis == 1:
+		gray = gray.T
+	mismatch = gray.min(axis=1) <= threshold if value else gray.max(axis=1) > threshold
+	if reverse:
+		mismatch = mismatch[::-1]
+	index = _first_true(mismatch)
+	if index is None:
+		return None
+	return high - 1 - index if reverse else low + index
+
+def _crop_bounds(lines, top_val, bottom_val, threshold=None):
+	"""找到从四边向内第一条不全为边框值的行/列，返回(top, bottom, left, right)
+
+	给出threshold时lines为灰度图，按 lines > threshold 即时二值化"""
+	height, width = lines.shape
+	if lines.size <= _DIRECT_SCAN_AREA:
+		# 小格子一次性求出每行/列的最值，比分块扫描的调用开销更小
+		level = 0 if threshold is None else threshold
+		row_min, row_max = lines.min(axis=1), lines.max(axis=1)
+		col_min, col_max = lines.min(axis=0), lines.max(axis=0)
+		top_high, bottom_high = bool(top_val > 0), bool(bottom_val > 0)
+		top = _first_true(row_min <= level if top_high else row_max > level)
+		bottom = _first_true((row_min <= level if bottom_high else row_max > level)[::-1])
+		left = _first_true(col_min <= level if top_high else col_max > level)
+		right = _first_true((col_min <= level if bottom_high else col_max > level)[::-1])
+	else:
+		top = _first_mismatch(lines, top_val, threshold)
+		bottom = _first_mismatch(lines[::-1], bottom_val, threshold)
+		left = _first_mismatch(lines.T, top_val, threshold)
+		right = _first_mismatch(lines.T[::-1], bottom_val, threshold)
+
+	top_crop = 0 if top is None else top
+	bottom_crop = height if bottom is None else height - bottom
+	left_crop = 0 if left is None else left
+	right_crop = width if right is None else width - right
+
+	return top_crop, bottom_crop, left_crop, right_crop
+
+def _first_mismatch(lines, value, threshold=None):
+	"""返回lines中第一条不全为value的线的下标，没有则返回None
+
+	从开头向内分块扫描且块大小逐次翻倍，代价与边距大小成正比而不是与格子大小成正比"""
+	# 二值图可视为阈值为0；不全为value等价于：value为高值时最小值不高于阈值，为低值时最大值高于阈值
+	high = bool(value > 0)
+	level = 0 if threshold is None else threshold
+	start, step = 0, _SCAN_BLOCK
+	while start < len(lines):
+		block = lines[start:start + step]
+		mismatch = block.min(axis=1) <= level if high else block.max(axis=1) > level
+		if mismatch.any():
+			return start + int(mismatch.argmax())
+		start += step
+		step *= 2
+	return None
+
+def _first_true(mask):
+	index = int(mask.argmax())
+	return index if mask[index] else None
+
+def otsu_threshold(hist) -> int:
+	"""由256级灰度直方图计算Otsu阈值，二值化结果与cv2.THRESH_OTSU一致
+
+	向量化计算各阈值的类间方差。只有当最大值附近存在对应不同二值化结果的近似并列时，
+	才回退到逐级复现cv2浮点运算顺序的循环，以保证并列时的选择与cv2相同"""
+	hist = np.asarray(hist, np.int64)
+	total = int(hist.sum())
+	if total == 0:
+		return 0
+	scale = 1. / total
+	levels = np.arange(256)
+	mu = float(np.dot(levels, hist)) * scale
+	p = hist * scale
+	q1 = np.cumsum(p)
+	q2 = 1. - q1
+	valid = (np.minimum(q1, q2) >= _FLT_EPSILON) & (np.maximum(q1, q2) <= 1. - _FLT_EPSILON)
+	if not valid.any():
+		return 0
+	with np.errstate(divide='ignore', invalid='ignore'):
+		mu1 = np.cumsum(levels * p) / q1
+		mu2 = (mu - q1 * mu1) / q2
+		sigma = np.where(valid, q1 * q2 * (mu1 - mu2) ** 2, 0.)
+	best = int(sigma.argmax())
+	if sigma[best] <= 0:
+		return 0
+	# 并列的阈值之间若没有任何像素，二值化结果相同，可直接返回
+	ties = np.flatnonzero(sigma >= sigma[best] * (1 - 1e-9))
+	cumulative = np.cumsum(hist)
+	if cumulative[ties[0]] == cumulative[ties[-1]]:
+		return best
+	return _otsu_threshold_exact(hist, mu, scale)
+
+def _otsu_threshold_exact(hist, mu, scale) -> int:
+	"""按cv2的运算顺序逐级计算Otsu阈值"""
+	nonzero = np.flatnonzero(hist)
+	counts = hist.tolist()
+	eps, upper = _FLT_EPSILON, 1. - _FLT_EPSILON
+	mu1 = q1 = 0.
+	max_sigma = max_val = 0
+	# 首个非零灰度之前与最后一个非零灰度之后q1或q2为0，cv2会直接跳过
+	for i in range(nonzero[0], nonzero[-1] + 1):
+		p_i = counts[i] * scale
+		mu1 *= q1
+		q1 += p_i
+		q2 = 1. - q1
+		if q1 < eps or q2 < eps or q1 > upper or q2 > upper:
+			continue
+		mu1 = (mu1 + i * p_i) / q1
+		mu2 = (mu - q1 * mu1) / q2
+		sigma = q1 * q2 * (mu1 - mu2) * (mu1 - mu2)
+		if sigma > max_sigma:
+			max_sigma = sigma
+			max_val = int(i)
+	return max_val
+
+class BorderCache:
+	"""边框检测结果的LRU缓存，键为(图片标识, x, y, w, h)
+
+	预览线程和界面线程共用，按条目数淘汰；info()返回命中/未命中统计。"""
+
+	def __init__(self, max_entries: int = 4096):
+		self.max_entries = max_entries
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key):
+		with self._lock:
+			result = self._entries.get(key)
+			if result is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+				self._entries.move_to_end(key)
+			return result
+
+	def put(self, key, result):
+		with self._lock:
+			self._entries[key] = result
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self.hits = self.misses = 0
+
+	def info(self):
+		"""返回{'hits', 'misses', 'entries', 'max_entries'}"""
+		with self._lock:
+			return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'max_entries': self.max_entries}
+
+# 预览、分割和导出共用的边框检测缓存
+border_cache = BorderCache()
+
+class BorderIndex:
+	"""整图预计算的边框检测索引
+
+	首次需要时计算一次灰度图（gray）和分块积分直方图（build()，每TILE×TILE一块的累积灰度直方图）。
+	任意矩形的直方图由内部整块的四次查表加上边缘不足一块的窄条得到，
+	因此大格子的Otsu阈值不再需要遍历全部像素，边距扫描也只读取灰度图的边缘部分。
+	边距扫描不查表：逐行/列的累积直方图每个像素要存256个计数，整图放不下，扫描仍读取灰度图。
+	小于DIRECT_AREA的格子不查表：像素很少时cv2一次完成统计和二值化，比在Python中由直方图求阈值更快；
+	这时每个格子的开销主要是逐次调用本身，4000×4000上20×20网格全部重新检测约需40-55 ms，多于一帧（预览在后台线程中计算）。
+	detect_border的结果与对同一区域调用detect_border_with_otsu完全一致，并按(索引序号, 矩形)存入cache。
+	margins为此前对同一张图检测的结果（见margins()，如来自AnalysisCache），命中时不必计算灰度图和索引。"""
+	TILE = 64
+	DIRECT_AREA = 256 * 256  # 小于此面积的格子不查表，直接用detect_border_with_otsu检测（更快）
+	MAX_MARGINS = 1024  # margins()保留的最近结果数
+	_serial = itertools.count()
+
+	def __init__(self, img_array, cache: BorderCache = border_cache, margins=None):
+		self.key = next(self._serial)  # 图片标识，每次构建索引（即每次加载图片）都不同
+		self.cache = cache
+		self.shape = img_array.shape[:2]
+		self._array = img_array
+		self._gray = None
+		self.table = None  # 分块积分直方图，build()时计算
+		self._lock = threading.Lock()
+		self._margins = OrderedDict(((x, y, w, h), (top, bottom, left, right)) for x, y, w, h, top, bottom, left, right in margins or ())
+
+	@property
+	def gray(self) -> np.ndarray:
+		"""整图灰度图（只计算一次）；不构建积分直方图，自动网格、自动分页等只需要灰度图的调用不必付出构建索引的代价"""
+		with self._lock:
+			if self._gray is None:
+				with trace.span('gray'):
+					self._gray = to_gray(self._array)
+			return self._gray
+
+	def build(self):
+		"""计算灰度图和积分直方图（只计算一次，多个线程同时调用时其余的等待）"""
+		gray = self.gray
+		with self._lock:
+			if self.table is not None:
+				return
+			with trace.span('border_index'):
+				height, width = gray.shape
+				tile = self.TILE
+				rows, cols = height // tile, width // tile
+				dtype = np.int32 if height * width < 2**31 else np.int64
+				table = np.zeros((rows + 1, cols + 1, 256), dtype)
+				offsets = (np.arange(cols, dtype=np.int32) * 256)[None, :, None]
+				for row in range(rows):
+					band = gray[row*tile:(row+1)*tile, :cols*tile].reshape(tile, cols, tile)
+					counts = np.bincount((band + offsets).ravel(), minlength=cols * 256)
+					table[row + 1, 1:] = counts.reshape(cols, 256)
+				np.cumsum(table, axis=0, out=table)
+				np.cumsum(table, axis=1, out=table)
+				self.table = table
+
+	def histogram(self, x: int, y: int, w: int, h: int) -> np.ndarray:
+		"""返回矩形区域的256级灰度直方图"""
+		self.build()
+		gray = self._gray
+		tile = self.TILE
+		x2, y2 = x + w, y + h
+		# 完全位于矩形内部的整块范围
+		tx1, ty1 = -(-x // tile), -(-y // tile)
+		tx2 = min(x2 // tile, self.table.shape[1] - 1)
+		ty2 = min(y2 // tile, self.table.shape[0] - 1)
+		if tx2 <= tx1 or ty2 <= ty1 or w * h <= self.DIRECT_AREA:
+			return _bincount(gray[y:y2, x:x2])
+
+		t = self.table
+		hist = (t[ty2, tx2] - t[ty1, tx2] - t[ty2, tx1] + t[ty1, tx1]).astype(np.int64)
+		ix1, iy1, ix2, iy2 = tx1 * tile, ty1 * tile, tx2 * tile, ty2 * tile
+		for strip in (gray[y:iy1, x:x2], gray[iy2:y2, x:x2], gray[iy1:iy2, x:ix1], gray[iy1:iy2, ix2:x2]):
+			if strip.size:
+				hist += _bincount(strip)
+		return hist
+
+	def detect_border(self, x: int, y: int, w: int, h: int):
+		"""返回(top, bottom, left, right)，与detect_border_with_otsu(img[y:y+h, x:x+w])相同"""
+		key = (self.key, x, y, w, h)
+		rect = key[1:]
+		result = self.cache.get(key)
+		if result is None:
+			with self._lock:
+				result = self._margins.get(rect)
+			if result is None and w * h < self.DIRECT_AREA:
+				# 小格子交给cv2的Otsu（统计和二值化都在C中完成），比查表后在Python中求阈值更快；
+				# 不需要积分直方图，索引尚未构建时直接读取原图
+				source = self._gray if self._gray is not None else self._array
+				result = detect_border_with_otsu(source[y:y+h, x:x+w])
+			elif result is None:
+				cell = self.gray[y:y+h, x:x+w]
+				threshold = otsu_threshold(self.histogram(x, y, w, h))
+				result = _crop_bounds(cell, cell[0, 0] > threshold, cell[-1, -1] > threshold, threshold)
+			self.cache.put(key, result)
+		with self._lock:
+			self._margins[rect] = result
+			self._margins.move_to_end(rect)
+			if len(self._margins) > self.MAX_MARGINS:
+				self._margins.popitem(last=False)
+		return result
+
+	def margins(self) -> list:
+		"""最近检测过的边框，[(x, y, w, h, top, bottom, left, right), ...]，可作为构造参数margins"""
+		with self._lock:
+			return [tuple(int(value) for value in rect + result) for rect, result in self._margins.items()]
+
+def _bincount(gray):
+	"""灰度直方图；cv2.calcHist可直接读取非连续视图，float32计数在2^24以内是精确的"""
+	if gray.size >= 2**24:
+		return np.bincount(gray.ravel(), minlength=256)
+	return _cv2().calcHist([gray], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+
+def _gutters(blank: np.ndarray, min_gap: int):
+	"""blank为一维布尔数组（整行/列为背景），返回足够宽的背景带中点（相对位置）
+
+	只保留宽度不小于min_gap且不小于最宽背景带一半的带，避免把文字行距当成分隔带"""
+	edges = np.diff(blank.astype(np.int8), prepend=0, append=0)
+	starts = np.flatnonzero(edges == 1)
+	ends = np.flatnonzero(edges == -1)
+	widths = ends - starts
+	if not widths.size:
+		return []
+	keep = widths >= max(min_gap, widths.max() / 2)
+	return ((starts[keep] + ends[keep]) / 2).tolist()
+
+def detect_grid(img_array, tolerance: int = 8, min_gap_ratio: float = 0.005):
+	"""由行/列投影自动检测网格（如论文图中的子图）
+
+	背景取图片四边的灰度中位数，整行/列都在背景±tolerance内视为空白。
+	返回(选区(x, y, w, h), 行切分, 列切分)，选区为内容的外接矩形，切分为选区内背景带中点的归一化位置
+	（可直接作为AppConfig.row_splits/col_splits）；整张图都是背景时返回None"""
+	gray = to_gray(img_array)
+	border = np.concatenate([gray[0], gray[-1], gray[:, 0], gray[:, -1]])
+	background = int(np.median(border))
+	low, high = background - tolerance, background + tolerance
+
+	def blank(region, axis):
+		# 每行（axis=1）或每列（axis=0）的最小、最大值均在背景范围内
+		return (region.min(axis=axis) >= low) & (region.max(axis=axis) <= high)
+
+	content_rows = np.flatnonzero(~blank(gray, 1))
+	if not content_rows.size:
+		return None
+	top, bottom = int(content_rows[0]), int(content_rows[-1]) + 1
+	blank_cols = blank(gray[top:bottom], 0)
+	content_cols = np.flatnonzero(~blank_cols)
+	left, right = int(content_cols[0]), int(content_cols[-1]) + 1
+	blank_rows = blank(gray[top:bottom, left:right], 1)
+
+	width, height = right - left, bottom - top
+	row_cuts = _gutters(blank_rows, max(3, round(height * min_gap_ratio)))
+	col_cuts = _gutters(blank_cols[left:right], max(3, round(width * min_gap_ratio)))
+	return (left, top, width, height), [cut / height for cut in row_cuts], [cut / width for cut in col_cuts]
+
+def ink_profile(img_array, tolerance: int = 8) -> np.ndarray:
+	"""每行的墨迹密度：与背景灰度相差超过tolerance的像素比例，返回长度为高度的float32数组
+
+	背景取四边的灰度中位数（同detect_grid）；按条带转灰度并计数，不生成整图大小的临时数组"""
+	height, width = img_array.shape[:2]
+	border = np.concatenate([img_array[0], img_array[-1], img_array[:, 0], img_array[:, -1]])
+	background = int(np.median(to_gray(border[np.newaxis])))
+	low, high = background - tolerance, background + tolerance
+	profile = np.empty(height, np.float32)
+	for top in range(0, height, _PROFILE_ROWS):
+		gray = to_gray(img_array[top:top + _PROFILE_ROWS])
+		profile[top:top + len(gray)] = np.count_nonzero((gray < low) | (gray > high), axis=1)
+	return profile / width
+
+def page_breaks(profile: np.ndarray, page_height: float, slack: float = PAGE_SLACK) -> list:
+	"""由行墨迹密度选择分页位置，返回各页下边的行号（不含最后一页），每页高度在[page_height×(1-slack), page_height]内，最后一页可以更短
+
+	在第i行之前切分的代价：上下_CUT_MARGIN行内都没有墨迹为0，否则为1+其中的最大密度；每页另计1。
+	动态规划best[i] = cost[i] + 1 + min(best[j]，i-page_height <= j <= i-最小页高)求总代价最小的切分，
+	即先保证切分都落在空白带上（只要页高范围内有空白带），再使页数最少。
+	窗口最小值用单调队列维护，总耗时与高度成正比；代价相同时取靠后的切分，各页尽量排满"""
+	height = len(profile)
+	longest = max(1, int(page_height))
+	shortest = max(1, min(longest, round(longest * (1 - slack))))
+	if height <= longest:
+		return []
+
+	# 切分代价：cost[i]对应第i-1行与第i行之间
+	padded = np.concatenate([np.zeros(_CUT_MARGIN, profile.dtype), profile, np.zeros(_CUT_MARGIN, profile.dtype)])
+	ink = np.lib.stride_tricks.sliding_window_view(padded, 2 * _CUT_MARGIN).max(axis=1)[:height]
+	cost = np.where(ink > 0, 1 + ink, 0).tolist()
+
+	best = [math.inf] * height
+	previous = [0] * height
+	best[0] = 0.
+	window = deque()  # 候选j，best[j]递增
+	for i in range(shortest, height):
+		j = i - shortest
+		if best[j] < math.inf:
+			while window and best[window[-1]] >= best[j]:
+				window.pop()
+			window.append(j)
+		while window and window[0] < i - longest:
+			window.popleft()
+		if window:
+			best[i] = best[window[0]] + cost[i] + 1
+			previous[i] = window[0]
+
+	# 最后一页不限最短高度：在可达的切分中取代价最小且最靠后的，但最后一页要包含最后一行墨迹，
+	# 否则内容之后的空白带上的切分代价同样为0，会留下一页空白（内容之后的空白超过一页时无法避免）。
+	# 最后一页高度范围内总有可达的切分；包含墨迹的范围内都不可达时退回整个范围
+	inked = np.flatnonzero(profile)
+	upper = height - 1 if not inked.size else max(min(int(inked[-1]), height - 1), height - longest)
+	tail = [i for i in range(height - 1, height - longest - 1, -1) if best[i] < math.inf]
+	last = min([i for i in tail if i <= upper] or tail, key=best.__getitem__)
+	cuts = []
+	while last > 0:
+		cuts.append(last)
+		last = previous[last]
+	return cuts[::-1]
+
+def detect_pages(img_array, rect, page_size, slack: float = PAGE_SLACK, tolerance: int = 8) -> list:
+	"""按PDF页面比例把选区自动分页（长截图导出为A4等）：切分尽量落在空白带上，每页高度接近选区宽度对应的页面高度
+
+	img_array可以是整图的RGB(A)或灰度数组，rect为取整后的选区(x, y, w, h)，page_size为(宽, 高)（见AppConfig.page_size）。
+	返回选区内的归一化行切分，可直接作为单列网格的AppConfig.row_splits（grid_rows为其长度加1）"""
+	left, top, width, height = rect
+	page_width, page_height = page_size
+	profile = ink_profile(img_array[top:top + height, left:left + width], tolerance)
+	return [cut / height for cut in page_breaks(profile, width * page_height / page_width, slack)]
+
+def preview_rects(rect, rows: int, cols: int, index: BorderIndex = None, row_splits=None, col_splits=None):
+	"""计算预览框（浮点，场景坐标即图片坐标），给出index时按检测到的边框收缩"""
+	left, top, width, height = rect
+	xs = grid_edges(left, width, cols, col_splits)
+	ys = grid_edges(top, height, rows, row_splits)
+
+	rects = []
+	for row in range(rows):
+		for col in range(cols):
+			# Calculate cell position in display coordinates
+			x, y = xs[col], ys[row]
+			w, h = xs[col + 1] - x, ys[row + 1] - y
+
+			if index is not None:
+				# Convert to original image coordinates
+				x_orig, y_orig = round(x), round(y)
+				x2 = min(x_orig + round(w), index.shape[1])
+				y2 = min(y_orig + round(h), index.shape[0])
+				try:
+					with trace.span('detect_border'):
+						top_crop, bottom_crop, left_crop, right_crop = index.detect_border(x_orig, y_orig, x2 - x_orig, y2 - y_orig)
+					x += left_crop
+					y += top_crop
+					w = right_crop - left_crop
+					h = bottom_crop - top_crop
+				except:
+					pass  # If border detection fails, use original coordinates
+
+			rects.append((x, y, w, h))
+	return rects
+
+def split_cells(arr: np.ndarray, rect, rows: int, cols: int, cut_border: bool = False, index: BorderIndex = None, row_splits=None, col_splits=None, pyramid: bool = False):
+	"""按网格切分RGB数组，返回每个格子的数组视图列表（行优先）
+
+	给出index（由同一张图构建）时用它检测边框，避免逐格子遍历像素；否则逐格子检测，pyramid见detect_border_with_otsu"""
+	images = []
+	for x, y, w, h in grid_cells(rect, rows, cols, row_splits, col_splits):
+		# Crop cell (a view, no copy)
+		cell_arr = arr[y:y+h, x:x+w]
+
+		# Cut border if needed
+		if cut_border:
+			try:
+				with trace.span('detect_border'):
+					if index is not None:
+						top_crop, bottom_crop, left_crop, right_crop = index.detect_border(x, y, w, h)
+					else:
+						top_crop, bottom_crop, left_crop, right_crop = detect_border_with_otsu(cell_arr, pyramid)
+				cell_arr = cell_arr[top_crop:bottom_crop, left_crop:right_crop]
+			except:
+				pass  # Keep original if border detection fails
+
+		images.append(cell_arr)
+	return images
+
+def stream_cells(reader: StripReader, rect, rows: int, cols: int, cut_border: bool = False, row_splits=None, col_splits=None, pyramid: bool = False):
+	"""按网格行依次读取条带并切分，逐行产出该行格子的数组视图列表（低内存导出）
+
+	格子与split_cells对整图切分（不使用BorderIndex）的结果相同。生成器不保留已产出的条带，
+	调用方在处理完一行后释放格子，同一时间只有一个网格行驻留内存"""
+	left, top, width, height = rect
+	ys = _int_edges(top, height, rows, row_splits)
+	for row in range(rows):
+		strip_height = ys[row + 1] - ys[row]
+		# 单行网格的下边是top + height - 1（见_int_edges），高度多给1使条带的每一行都在格子内
+		yield split_cells(reader.read(ys[row], ys[row + 1]), (left, 0, width, strip_height + 1), 1, cols, cut_border, None, None, col_splits, pyramid)
+
+def image_hash(img_array: np.ndarray) -> str:
+	"""像素内容的哈希（十六进制），与文件名和编码格式无关，用作AnalysisCache的键
+
+	使用sha256：OpenSSL的实现在多数CPU上有硬件加速，比blake2b快2倍多（约1 GB/s）。
+	按行分为若干条带在线程池中并行计算（hashlib计算时释放GIL），再对形状和各条带的摘要求哈希；
+	非连续的视图逐条带复制，不复制整图"""
+	height = img_array.shape[0]
+	step = max(_HASH_STRIP // max(img_array[:1].nbytes, 1), 1)
+
+	def digest(start):
+		strip = np.ascontiguousarray(img_array[start:start+step])
+		return hashlib.sha256(strip.data).digest()
+
+	with trace.span('image_hash'), ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+		total = hashlib.sha256(repr((img_array.shape, img_array.dtype.str)).encode())
+		for strip_digest in executor.map(digest, range(0, height, step)):
+			total.update(strip_digest)
+	return total.hexdigest()[:32]
+
+def preview_level(width: int, height: int, size: int = PREVIEW_SIZE):
+	"""逐次减半（与界面分块金字塔的层级相同）直到最长边不超过size，返回(层级, 宽, 高)"""
+	level = 0
+	while max(width, height) > size:
+		width, height = max(width // 2, 1), max(height // 2, 1)
+		level += 1
+	return level, width, height
+
+def make_preview(img_array: np.ndarray, size: int = PREVIEW_SIZE):
+	"""缩小的预览图，返回(层级, RGBA数组)（见preview_level）；图片本身不超过size时返回None
+
+	与界面的分块金字塔一样逐次减半（INTER_AREA的2倍缩小有快速实现，比一次缩小到目标尺寸快数倍），像素与其层级相同"""
+	level = preview_level(img_array.shape[1], img_array.shape[0], size)[0]
+	if level == 0:
+		return None
+	cv2 = _cv2()
+	with trace.span('make_preview'):
+		preview = img_array
+		for _ in range(level):
+			height, width = preview.shape[:2]
+			preview = cv2.resize(preview, (max(width // 2, 1), max(height // 2, 1)), interpolation=cv2.INTER_AREA)
+	return level, preview
+
+@dataclass
+class ImageAnalysis:
+	"""AnalysisCache.lookup的结果：内容哈希、缓存的条目（没有时为None）和预览(层级, RGBA数组)（图片不超过PREVIEW_SIZE时为None）
+
+	条目为{'size': [宽, 高], 'selection': 归一化选区, 'grid': [行, 列], 'row_splits', 'col_splits', 'margins': 见BorderIndex.margins()}"""
+	key: str
+	entry: dict = None
+	preview: tuple = None
+
+	@property
+	def margins(self) -> list:
+		return self.entry.get('margins', []) if self.entry is not None else []
+
+	def apply(self, config: AppConfig) -> bool:
+		"""把缓存的选区和网格写入config，没有缓存时返回False"""
+		if self.entry is None:
+			return False
+		try:
+			x, y, w, h = (float(value) for value in self.entry['selection'])
+			rows, cols = (int(value) for value in self.entry['grid'])
+			row_splits, col_splits = self.entry['row_splits'], self.entry['col_splits']
+		except (KeyError, TypeError, ValueError):
+			return False
+		if rows < 1 or cols < 1:
+			return False
+		config.selection_x_normalized, config.selection_y_normalized, config.selection_w_normalized, config.selection_h_normalized = x, y, w, h
+		config.grid_rows, config.grid_cols = rows, cols
+		config.row_splits = row_splits if valid_splits(row_splits, rows) else None
+		config.col_splits = col_splits if valid_splits(col_splits, cols) else None
+		return True
+
+class AnalysisCache:
+	"""按像素内容哈希保存每张图片分析结果的磁盘缓存
+
+	每张图片一个JSON条目（选区、网格和已检测的边框，见ImageAnalysis）和一张缩小的预览PNG，
+	总大小超过max_bytes时按最近使用时间（文件修改时间，读取时更新）淘汰最久未使用的图片。
+	读写失败时静默忽略：缓存只用于加速，不影响结果。"""
+
+	def __init__(self, directory: str, max_bytes: int = 256 * 1024**2):
+		self.directory = directory
+		self.max_bytes = max_bytes
+
+	def _path(self, key: str, suffix: str) -> str:
+		return os.path.join(self.directory, key + suffix)
+
+	def lookup(self, img_array: np.ndarray) -> ImageAnalysis:
+		"""计算内容哈希并读取缓存；没有缓存的预览时当场生成并写入"""
+		key = image_hash(img_array)
+		height, width = img_array.shape[:2]
+		analysis = ImageAnalysis(key, self.get(key))
+		if analysis.entry is not None and analysis.entry.get('size') != [width, height]:
+			analysis.entry = None  # 条目与图片不符（如手动修改过），按未缓存处理
+		level, preview_width, preview_height = preview_level(width, height)
+		if level:
+			preview = self.get_preview(key) if analysis.entry is not None else None
+			if preview is not None and preview.shape == (preview_height, preview_width, 4):
+				analysis.preview = level, preview
+			else:
+				analysis.preview = make_preview(img_array)
+				self.put_preview(key, analysis.preview[1])
+		return analysis
+
+	def get(self, key: str):
+		"""返回缓存的条目（dict），没有则返回None；命中时更新使用时间"""
+		path = self._path(key, '.json')
+		try:
+			with open(path, 'r') as f:
+				entry = json.load(f)
+			os.utime(path)
+		except (OSError, ValueError):
+			return None
+		return entry
+
+	def get_preview(self, key: str):
+		"""返回缓存的RGBA预览数组，没有则返回None"""
+		path = self._path(key, '.png')
+		try:
+			with _pil().open(path) as img:
+				preview = np.asarray(img.convert('RGBA'))
+			os.utime(path)
+		except (OSError, ValueError):
+			return None
+		return preview
+
+	def put(self, key: str, entry: dict):
+		self._write(key, '.json', json.dumps(entry).encode())
+
+	def remember(self, analysis: ImageAnalysis, config: AppConfig, size, margins):
+		"""保存图片当前的选区、网格（取自config）和检测过的边框（见BorderIndex.margins()），并更新analysis.entry"""
+		analysis.entry = {
+			'size': list(size),
+			'selection': [config.selection_x_normalized, config.selection_y_normalized, config.selection_w_normalized, config.selection_h_normalized],
+			'grid': [config.grid_rows, config.grid_cols],
+			'row_splits': config.row_splits,
+			'col_splits': config.col_splits,
+			'margins': margins,
+		}
+		self.put(analysis.key, analysis.entry)
+
+	def put_preview(self, key: str, preview: np.ndarray):
+		buffer = io.BytesIO()
+		cell_image(preview, alpha=True).save(buffer, 'PNG', compress_level=1)
+		self._write(key, '.png', buffer.getvalue())
+
+	def _write(self, key: str, suffix: str, data: bytes):
+		"""写入临时文件后替换，另一个进程同时读取时不会读到写了一半的文件；写入后按大小淘汰"""
+		path = self._path(key, suffix)
+		try:
+			os.makedirs(self.directory, exist_ok=True)
+			with open(path + '.tmp', 'wb') as f:
+				f.write(data)
+			os.replace(path + '.tmp', path)
+		except OSError:
+			return
+		self.evict()
+
+	def evict(self):
+		"""总大小超过max_bytes时，从最久未使用的图片开始删除其条目和预览"""
+		images = {}  # 键 -> [最近使用时间, 字节数, 路径...]
+		try:
+			with os.scandir(self.directory) as entries:
+				for entry in entries:
+					key, suffix = os.path.splitext(entry.name)
+					if suffix not in ('.json', '.png') or not entry.is_file():
+						continue
+					stat = entry.stat()
+					record = images.setdefault(key, [0., 0])
+					record[0] = max(record[0], stat.st_mtime)
+					record[1] += stat.st_size
+					record.append(entry.path)
+		except OSError:
+			return
+		total = sum(record[1] for record in images.values())
+		for record in sorted(images.values()):
+			if total <= self.max_bytes:
+				break
+			_remove_files(record[2:])
+			total -= record[1]
+
+	def clear(self):
+		"""删除全部缓存文件"""
+		try:
+			names = os.listdir(self.directory)
+		except OSError:
+			return
+		_remove_files(os.path.join(self.directory, name) for name in names if name.endswith(('.json', '.png', '.tmp')))
+
+class Cancelled(Exception):
+	"""任务被取消：由进度回调抛出，save_cells/export_pdf删除已写出的部分后继续向上抛出"""
+
+def _remove_files(paths):
+	for path in paths:
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+
+def _save_options(format: str, compression: str, optimize: bool, quality: int, effort: str) -> dict:
+	"""格式对应的Pillow保存参数"""
+	if format == 'png':
+		return {'compress_level': PNG_COMPRESSION[compression], 'optimize': optimize}
+	options = dict(ENCODE_EFFORT[format][effort])
+	if format in LOSSY_FORMATS:
+		options['quality'] = quality
+	return options
+
+def save_cells(images, save_dir: str, base_name: str, cols: int, compression: str = 'default', optimize: bool = False, workers: int = None, alpha: bool = False,
+		format: str = 'png', quality: int = 90, effort: str = 'default', progress=None, start: int = 0):
+	"""在线程池中并行编码并保存格子（命名为base_rXcY.扩展名）
+
+	format为IMAGE_FORMATS之一：png使用compression（PNG_COMPRESSION中的档位）和optimize，
+	其他格式按effort（ENCODE_EFFORT中的档位）权衡速度与体积，jpeg/webp/avif另按quality有损编码；
+	tiff把全部格子依次写入一个多页文件base.tif。alpha为True时RGBA格子保留透明通道（JPEG不支持，忽略）。
+	progress(已完成, 总数)在调用线程中于每个格子写完后调用（tiff只在开始和结束时调用），抛出Cancelled时
+	不再开始剩余的格子，删除本次已写出的文件后重新抛出。返回(写出的格子数, 失败的格子列表[(路径, 错误信息)])，
+	tiff写出的格子数为页数（整个文件写入失败时为0）
+	start为images中第一个格子的序号（分批写出一张图的格子时使用），tiff在start>0时追加到已有文件之后"""
+	options = _save_options(format, compression, optimize, quality, effort)
+	alpha = alpha and format != 'jpeg'
+	if format == 'tiff':
+		return _save_tiff(images, os.path.join(save_dir, base_name + IMAGE_FORMATS['tiff']), cols, alpha, options, progress, start)
+	extension = IMAGE_FORMATS[format]
+
+	def save(idx, cell_arr):
+		row, col = divmod(start + idx, cols)
+		save_path = os.path.join(save_dir, f'{base_name}_r{row+1}c{col+1}{extension}')
+		try:
+			with trace.span(f'encode_{format}', path=save_path):
+				cell_image(cell_arr, alpha, format).save(save_path, format.upper(), **options)
+		except Exception as e:
+			return save_path, str(e)
+		return save_path, None
+
+	# 编码期间Pillow会释放GIL，线程数按CPU核数即可
+	results = [None] * len(images)
+	with trace.span('save_cells', count=len(images)), ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+		futures = {executor.submit(save, idx, cell_arr): idx for idx, cell_arr in enumerate(images)}
+		try:
+			for done, future in enumerate(as_completed(futures), 1):
+				results[futures[future]] = future.result()
+				if progress is not None:
+					progress(done, len(images))
+		except BaseException:
+			# 取消未开始的格子，等正在编码的格子写完后一并删除
+			for future in futures:
+				future.cancel()
+			wait(futures)
+			_remove_files(future.result()[0] for future in futures if not future.cancelled())
+			raise
+	failures = [(save_path, error) for save_path, error in results if error is not None]
+	return len(images) - len(failures), failures
+
+def _save_tiff(images, save_path: str, cols: int, alpha: bool, options: dict, progress=None, start: int = 0):
+	"""把非空格子按顺序写为多页TIFF（逐页编码，不能并行），start>0时追加到已有文件之后；空格子记为失败
+	返回值见save_cells"""
+	if progress is not None:
+		progress(0, len(images))
+	failures = []
+	pages = []
+	for idx, cell_arr in enumerate(images, start):
+		if cell_arr.size == 0:
+			row, col = divmod(idx, cols)
+			failures.append((f'{save_path} (r{row+1}c{col+1})', 'cannot write empty image'))
+		else:
+			pages.append(cell_image(cell_arr, alpha, 'tiff'))  # 共享像素内存，不复制
+	if pages:
+		try:
+			with trace.span('save_cells', count=len(pages)), trace.span('encode_tiff', path=save_path):
+				if start:
+					from PIL import TiffImagePlugin
+					with TiffImagePlugin.AppendingTiffWriter(save_path) as tiff:
+						for page in pages:
+							page.save(tiff, 'TIFF', **options)
+							tiff.newFrame()
+				else:
+					pages[0].save(save_path, 'TIFF', save_all=True, append_images=pages[1:], **options)
+		except Exception as e:
+			failures.append((save_path, str(e)))
+			pages = []
+	if progress is not None:
+		try:
+			progress(len(images), len(images))
+		except BaseException:
+			_remove_files([save_path])
+			raise
+	return len(pages), failures
+
+def _jpeg_source_info(source: str):
+	"""若source为可直接嵌入PDF的JPEG（RGB或灰度），返回(w, h, mode)，否则返回None"""
+	if source is None:
+		return None
+	try:
+		with _pil().open(source) as img:
+			if img.format == 'JPEG' and img.mode in ('RGB', 'L'):
+				return (*img.size, img.mode)
+	except Exception:
+		pass
+	return None
+
+class PdfWriter:
+	"""逐页流式写出的PDF，每页一张按比例居中的图片，空白用边缘中位色填充
+
+	每页的图片、内容流和页面对象生成后立即写入文件，内存中只保留各对象的偏移量，
+	因此导出几百页时峰值内存约为一张图片。页面树、交叉引用表在close()时写在文件末尾。
+	作为上下文管理器使用时，以异常（包括Cancelled）退出会删除写了一半的文件。
+	single_image为True时add_cells把铺满同一区域的格子合并为一个图片对象（见add_region）。"""
+
+	_CATALOG, _PAGES = 1, 2  # 固定的对象号，页面对象引用页面树时它还没有写出
+	STRIP_BYTES = 1 << 20  # 压缩非连续视图时每次复制到条带缓冲区的字节数
+
+	def __init__(self, save_path: str, page_width: float, page_height: float, encoding: str = 'flate', jpeg_quality: int = 90, alpha: bool = False,
+			single_image: bool = False):
+		self.page_width = page_width
+		self.page_height = page_height
+		self.encoding = encoding
+		self.jpeg_quality = jpeg_quality
+		self.alpha = alpha
+		self.single_image = single_image
+		self._strip = np.empty(0, np.uint8)
+		self.save_path = save_path
+		self._file = open(save_path, 'wb')
+		self._offsets = {}
+		self._next_id = 3
+		self._pages = []
+		self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		if exc_info[0] is None:
+			self.close()
+		else:
+			self._file.close()
+			_remove_files([self.save_path])
+
+	def _write_object(self, obj_id: int, body: bytes, stream: bytes = None):
+		self._offsets[obj_id] = self._file.tell()
+		self._file.write(b'%d 0 obj\n' % obj_id + body)
+		if stream is not None:
+			self._file.write(b'\nstream\n')
+			self._file.write(stream)
+			self._file.write(b'\nendstream')
+		self._file.write(b'\nendobj\n')
+
+	def _new_id(self) -> int:
+		self._next_id += 1
+		return self._next_id - 1
+
+	def _deflate(self, pixels: np.ndarray) -> bytes:
+		"""zlib压缩像素；非连续视图（如RGBA中的RGB通道）按条带复制到复用的缓冲区后压缩，不复制整个格子"""
+		if pixels.flags.c_contiguous:
+			return zlib.compress(pixels)
+		row_bytes = pixels[0].size
+		rows = min(max(1, self.STRIP_BYTES // row_bytes), len(pixels))
+		if self._strip.size < rows * row_bytes:
+			self._strip = np.empty(rows * row_bytes, np.uint8)
+		compressor = zlib.compressobj()
+		chunks = []
+		for y in range(0, len(pixels), rows):
+			part = pixels[y:y + rows]
+			strip = self._strip[:part.size].reshape(part.shape)
+			np.copyto(strip, part)
+			chunks.append(compressor.compress(strip))
+		chunks.append(compressor.flush())
+		return b''.join(chunks)
+
+	def add_image(self, img_array: np.ndarray, jpeg: str = None):
+		"""添加一页；jpeg为与该格子相同的JPEG原图路径（见_jpeg_source_info）时直接嵌入其数据，不解码也不重新编码
+
+		img_array为RGB或RGBA数组；开启alpha且格子含透明像素时，alpha通道作为软蒙版（SMask）写入"""
+		image_id, width, height = self._write_image(img_array, jpeg)
+		self._write_page(image_id, width, height, img_array, (0, 0, width, height))
+
+	def add_region(self, region: np.ndarray, cells, rects, jpeg: str = None, progress=None):
+		"""把region作为一个图片对象写入一次，每个格子一页，页面上只显示该格子在region中的区域rects[i] = (x, y, w, h)
+
+		cells为region的子区域视图，仅用于计算各页的填充色；jpeg含义同add_image，progress见add_cells"""
+		image_id, width, height = self._write_image(region, jpeg)
+		for done, (cell, rect) in enumerate(zip(cells, rects), 1):
+			with trace.span('add_page'):
+				self._write_page(image_id, width, height, cell, rect)
+			if progress is not None:
+				progress(done, len(rects))
+
+	def _write_image(self, img_array: np.ndarray, jpeg: str = None):
+		"""写出图片对象（及其软蒙版），返回(对象号, 宽, 高)"""
+		height, width = img_array.shape[:2]
+		if jpeg is not None:
+			with open(jpeg, 'rb') as f:
+				data = f.read()
+			width, height, mode = _jpeg_source_info(jpeg)
+			color_space, image_filter = (b'/DeviceGray' if mode == 'L' else b'/DeviceRGB'), b'/DCTDecode'
+		elif self.encoding == 'jpeg':
+			img_buffer = io.BytesIO()
+			with trace.span('encode_jpeg'):
+				cell_image(img_array).save(img_buffer, format='JPEG', quality=self.jpeg_quality)
+			data, color_space, image_filter = img_buffer.getvalue(), b'/DeviceRGB', b'/DCTDecode'
+		else:
+			with trace.span('deflate'):
+				data = self._deflate(img_array[..., :3])
+			color_space, image_filter = b'/DeviceRGB', b'/FlateDecode'
+
+		smask = b''
+		if self.alpha and jpeg is None and img_array.shape[2] == 4 and img_array[..., 3].min() < 255:
+			with trace.span('deflate'):
+				mask = self._deflate(img_array[..., 3])
+			mask_id = self._new_id()
+			self._write_object(mask_id, b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode /Length %d >>'
+				% (width, height, len(mask)), mask)
+			smask = b' /SMask %d 0 R' % mask_id
+			del mask
+
+		image_id = self._new_id()
+		self._write_object(image_id, b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent 8 /Filter %s%s /Length %d >>'
+			% (width, height, color_space, image_filter, smask, len(data)), data)
+		return image_id, width, height
+
+	def _write_page(self, image_id: int, width: int, height: int, cell: np.ndarray, rect):
+		"""写出一页：显示图片对象（宽width、高height像素）中rect = (x, y, w, h)的部分，按比例居中，空白用cell的边缘中位色填充"""
+		rgb = cell[..., :3]
+		# Get median border value for padding
+		border = np.median(np.concatenate([rgb[0, :], rgb[-1, :], rgb[:, 0], rgb[:, -1]]), axis=0)
+		median_color = [int(i) / 255 for i in border]
+
+		# 先用中位色铺满页面，再把图片按比例缩放后居中
+		x, y, w, h = rect
+		scale = min(self.page_width / w, self.page_height / h)
+		draw_width, draw_height = w * scale, h * scale
+		left, bottom = (self.page_width - draw_width) / 2, (self.page_height - draw_height) / 2
+		content = '%.4f %.4f %.4f rg 0 0 %.4f %.4f re f q ' % (*median_color, self.page_width, self.page_height)
+		if rect == (0, 0, width, height):
+			content += '%.4f 0 0 %.4f %.4f %.4f cm /Im0 Do Q' % (draw_width, draw_height, left, bottom)
+		else:
+			# 裁剪到格子所在的矩形，再平移整张图片使格子落在其中（PDF的y轴向上，图片第0行在顶部）
+			content += '%.4f %.4f %.4f %.4f re W n %.4f 0 0 %.4f %.4f %.4f cm /Im0 Do Q' % (
+				left, bottom, draw_width, draw_height, width * scale, height * scale,
+				left - x * scale, bottom - (height - y - h) * scale)
+		content = content.encode()
+		content_id = self._new_id()
+		self._write_object(content_id, b'<< /Length %d >>' % len(content), content)
+
+		page_id = self._new_id()
+		self._write_object(page_id, b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.4f %.4f] /Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>'
+			% (self._PAGES, self.page_width, self.page_height, image_id, content_id))
+		self._pages.append(page_id)
+
+	def close(self):
+		"""写出页面树、目录和交叉引用表并关闭文件；没有任何页面时写一张空白页"""
+		if not self._pages:
+			page_id = self._new_id()
+			self._write_object(page_id, b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.4f %.4f] >>' % (self._PAGES, self.page_width, self.page_height))
+			self._pages.append(page_id)
+		kids = b' '.join(b'%d 0 R' % page_id for page_id in self._pages)
+		self._write_object(self._PAGES, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self._pages)))
+		self._write_object(self._CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % self._PAGES)
+
+		xref = self._file.tell()
+		self._file.write(b'xref\n0 %d\n0000000000 65535 f \n' % self._next_id)
+		for obj_id in range(1, self._next_id):
+			self._file.write(b'%010d 00000 n \n' % self._offsets[obj_id])
+		self._file.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (self._next_id, self._CATALOG, xref))
+		self._file.close()
+
+def _is_whole_source(img_array: np.ndarray, source_info) -> bool:
+	# 格子是原图的子区域；网格按QRect.right()计算会少最后一行/列像素，因此差1像素以内也视为整张原图
+	return source_info is not None and 0 <= source_info[0] - img_array.shape[1] <= 1 and 0 <= source_info[1] - img_array.shape[0] <= 1
+
+def _array_root(arr: np.ndarray) -> np.ndarray:
+	while isinstance(arr.base, np.ndarray):
+		arr = arr.base
+	return arr
+
+def _shared_region(images):
+	"""格子是同一数组中恰好铺满其外接矩形的视图（未裁边的网格）时，返回(外接矩形的视图, 各格子在其中的(x, y, w, h), 外接矩形左上角(x, y))
+
+	裁边后格子之间有空隙、格子来自不同数组或为副本时返回None"""
+	cells = [img_array for img_array in images if img_array.size]
+	if len(cells) < 2:
+		return None
+	first = cells[0]
+	root = _array_root(first)
+	row_stride, pixel_stride = first.strides[:2]
+	if first.dtype != np.uint8 or not root.flags.c_contiguous or row_stride <= 0 or pixel_stride <= 0:
+		return None
+	start = root.__array_interface__['data'][0]
+	rects = []
+	for cell in cells:
+		if cell.strides != first.strides or cell.shape[2:] != first.shape[2:] or _array_root(cell) is not root:
+			return None
+		# 按行跨度把格子首像素的字节偏移换算为坐标
+		y, x = divmod(cell.__array_interface__['data'][0] - start, row_stride)
+		if x % pixel_stride:
+			return None
+		rects.append((x // pixel_stride, y, cell.shape[1], cell.shape[0]))
+	left, top = min(x for x, _, _, _ in rects), min(y for _, y, _, _ in rects)
+	right, bottom = max(x + w for x, _, w, _ in rects), max(y + h for _, y, _, h in rects)
+	if sum(w * h for _, _, w, h in rects) != (right - left) * (bottom - top):
+		return None
+	flat = root.reshape(-1).view(np.uint8)
+	region = np.lib.stride_tricks.as_strided(flat[top * row_stride + left * pixel_stride:], (bottom - top, right - left) + first.shape[2:], first.strides, writeable=False)
+	return region, [(x - left, y - top, w, h) for x, y, w, h in rects], (left, top)
+
+def add_cells(writer: PdfWriter, images, source: str = None, progress=None) -> int:
+	"""把一张原图的格子逐页加入writer，空白格子裁边后没有内容，跳过；返回加入的页数
+
+	writer.single_image为True且格子铺满同一区域（见_shared_region）时，该区域只作为一个图片对象写入一次。
+	progress(已完成, 总数)在每页写完后调用，可以抛出Cancelled中止"""
+	source_info = _jpeg_source_info(source)
+	shared = _shared_region(images) if writer.single_image else None
+	if shared is not None:
+		region, rects, origin = shared
+		whole = origin == (0, 0) and _is_whole_source(region, source_info)
+		with trace.span('add_region', pages=len(rects)):
+			writer.add_region(region, [img_array for img_array in images if img_array.size], rects, source if whole else None, progress)
+		return len(rects)
+	pages = 0
+	for done, img_array in enumerate(images, 1):
+		if img_array.size:
+			with trace.span('add_page'):
+				writer.add_image(img_array, source if _is_whole_source(img_array, source_info) else None)
+			pages += 1
+		if progress is not None:
+			progress(done, len(images))
+	return pages
+
+def export_pdf(images, save_path: str, page_width: float, page_height: float, encoding: str = 'flate', jpeg_quality: int = 90, source: str = None, alpha: bool = False,
+		single_image: bool = False, progress=None):
+	"""将格子逐页写入PDF（页面尺寸单位point），图片按比例居中，空白用边缘中位色填充
+
+	encoding为PDF_ENCODINGS之一：flate直接对原始像素做一次zlib压缩（无损），jpeg以jpeg_quality编码为DCT流；
+	source为原图路径，格子即整张JPEG原图时直接嵌入原始数据，不解码也不重新编码；alpha为True时保留透明通道；
+	single_image为True时未裁边的格子共用一个图片对象，各页只显示其中对应的区域；
+	progress(已完成, 总数)在每页写完后调用，抛出Cancelled时删除写了一半的文件后重新抛出"""
+	with trace.span('render_pdf', pages=len(images)), PdfWriter(save_path, page_width, page_height, encoding, jpeg_quality, alpha, single_image) as writer:
+		add_cells(writer, images, source, progress)
@@ -0,0 +1,1678 @@
+import sys
+import os
+import math
+import time
+import itertools
+import threading
+from dataclasses import replace
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtWidgets import (
+	QApplication, QCheckBox, QComboBox, QDialog, QDoubleSpinBox, QFileDialog, QFormLayout, QFrame,
+	QGraphicsEllipseItem, QGraphicsItem, QGraphicsRectItem, QGraphicsScene, QGraphicsView, QGroupBox,
+	QHBoxLayout, QLabel, QMainWindow, QMessageBox, QProgressBar, QPushButton, QSizePolicy, QSpinBox, QStyle,
+	QStyleOptionGraphicsItem, QVBoxLayout, QWidget,
+)
+from PySide6.QtCore import QLineF, QObject, QPoint, QPointF, QRect, QRectF, QTimer, Qt, Signal
+from PySide6.QtGui import (
+	QBrush, QCloseEvent, QColor, QDragEnterEvent, QDropEvent, QImage, QImageReader, QKeyEvent,
+	QMouseEvent, QPainter, QPen, QPixmap, QPixmapCache, QResizeEvent, QWheelEvent,
+)
+import numpy as np
+from . import trace
+from .batch import run_batch, merge_pdf, summarize
+from .core import preload, Cancelled, AppConfig, AnalysisCache, ImageAnalysis, LOSSY_FORMATS, PDF_PRESETS, PDF_CUSTOM_PRESET, IMAGE_EXTENSIONS, selection_rect, crop_rect, valid_splits, grid_edges, detect_grid, detect_pages, border_cache, BorderIndex, preview_rects, split_cells, save_cells, export_pdf
+
+def qimage_view(image: QImage) -> np.ndarray:
+	"""返回与QImage共享内存的只读(h, w, 4)数组视图（不复制像素）"""
+	buffer = np.frombuffer(image.constBits(), np.uint8, count=image.sizeInBytes())
+	rows = buffer.reshape(image.height(), image.bytesPerLine())
+	return rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+
+def prepare_image(image: QImage, cache: AnalysisCache = None):
+	"""把图片原地转换为RGBA8888，返回(图片, 共享内存的像素视图, 边框索引, 缓存记录)
+
+	给出cache时按像素内容查找缓存（见AnalysisCache.lookup），命中时边框索引直接使用缓存的边框，
+	只在遇到新的格子时才计算灰度图和积分直方图；否则在加载线程中预先计算，记录为None表示不缓存"""
+	with trace.span('to_rgba'):
+		image.convertTo(QImage.Format.Format_RGBA8888)  # 原地转换，RGB通道顺序与numpy一致
+	array = qimage_view(image)
+	analysis = cache.lookup(array) if cache is not None else None
+	index = BorderIndex(array, margins=analysis.margins if analysis is not None else None)
+	if analysis is None or analysis.entry is None:
+		index.build()
+	return image, array, index, analysis
+
+def cut_cells(array: np.ndarray, rect, config: AppConfig, index: BorderIndex):
+	"""按config的网格切分选区rect，边框检测使用index；可在后台线程中调用
+
+	格子是整图RGBA缓冲区上的视图，编码器直接映射（见cell_image），不复制像素"""
+	with trace.span('get_split_images'):
+		return split_cells(array, rect, config.grid_rows, config.grid_cols, config.cut_border, index, config.row_splits, config.col_splits)
+
+def read_image(file_path: str, cache: AnalysisCache, progress):
+	"""加载任务：读取图片文件并准备显示所需的数据（见prepare_image），无法读取时返回None"""
+	with trace.span('load_image'):
+		with trace.span('read'):
+			image = QImageReader(file_path).read()
+		if image.isNull():
+			return None
+		progress(1, 2)
+		prepared = prepare_image(image, cache)
+	progress(2, 2)
+	return prepared
+
+def traced_preview_rects(*args):
+	"""预览线程中执行的预览计算，开启计时时记为update_preview"""
+	with trace.span('update_preview'):
+		return preview_rects(*args)
+
+class PreviewWorker(QObject):
+	"""在后台线程计算预览框
+
+	同一时间只计算一个请求；计算期间到达的新请求只保留最新的一个，
+	结果带有请求序号，界面据此丢弃过期结果。"""
+
+	finished = Signal(int, object, float)  # 请求序号, 预览框列表, 请求时刻
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='preview')
+		self._lock = threading.Lock()
+		self._pending = None
+		self._busy = False
+		self.generation = 0
+
+	def request(self, job):
+		"""提交预览计算任务（无参可调用对象），覆盖尚未开始的旧请求"""
+		with self._lock:
+			self.generation += 1
+			self._pending = (self.generation, job, time.perf_counter())
+			if not self._busy:
+				self._busy = True
+				self._executor.submit(self._run)
+
+	def cancel(self):
+		"""丢弃尚未开始的请求，并使正在计算的结果失效"""
+		with self._lock:
+			self.generation += 1
+			self._pending = None
+
+	def shutdown(self):
+		self.cancel()
+		self._executor.shutdown(wait=False)
+
+	def _run(self):
+		while True:
+			with self._lock:
+				if self._pending is None:
+					self._busy = False
+					return
+				generation, job, requested = self._pending
+				self._pending = None
+			try:
+				rects = job()
+			except Exception:
+				rects = None
+			self.finished.emit(generation, rects, requested)
+
+class BatchWorker(QObject):
+	"""在后台线程中驱动批量处理或合并PDF，逐张发出结果"""
+
+	progress = Signal(object)  # ImageResult
+	finished = Signal(float, object)  # 总用时（秒）, 中止整批的错误信息或None
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch')
+		self._stop = threading.Event()
+
+	def start(self, job):
+		"""job为无参可调用对象，返回逐张产出ImageResult的迭代器（如run_batch、merge_pdf）"""
+		self._stop.clear()
+		self._executor.submit(self._run, job)
+
+	def shutdown(self):
+		"""不再提交新图片，已开始的图片处理完后结束"""
+		self._stop.set()
+		self._executor.shutdown(wait=False)
+
+	def _run(self, job):
+		start = time.perf_counter()
+		error = None
+		results = None
+		try:
+			results = job()
+			for result in results:
+				self.progress.emit(result)
+				if self._stop.is_set():
+					break
+		except Exception as e:
+			error = str(e)
+		finally:
+			if results is not None:
+				results.close()
+			self.finished.emit(time.perf_counter() - start, error)
+
+class JobQueue(QObject):
+	"""在后台线程中按提交顺序依次执行任务，报告进度，可以取消
+
+	任务为可调用对象job(progress)，progress(已完成, 总数)在工作线程中调用并转发为progress信号；
+	任务被取消后，下一次调用progress时抛出Cancelled，由任务自身（如save_cells、export_pdf）删除已写出的部分。
+	尚未开始的任务被取消后不再执行。任务号在所有队列中唯一。"""
+
+	progress = Signal(int, int, int)  # 任务号, 已完成, 总数（0为未知）
+	finished = Signal(int, object, object)  # 任务号, 返回值, 异常（成功时为None，取消时为Cancelled）
+
+	PROGRESS_INTERVAL = 0.05  # 进度信号的最小间隔（秒），格子很多时不为每个格子向界面线程投递事件
+
+	_ids = itertools.count(1)
+
+	def __init__(self, name: str, parent=None):
+		super().__init__(parent)
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+		self._lock = threading.Lock()
+		self._cancelled = set()
+		self.pending = {}  # 任务号 -> 说明，已提交且未结束的任务（按提交顺序）
+
+	def submit(self, job, label: str = '') -> int:
+		with self._lock:
+			job_id = next(self._ids)
+			self.pending[job_id] = label
+		self._executor.submit(self._run, job_id, job)
+		return job_id
+
+	def cancel(self, job_id: int = None):
+		"""取消一个任务，job_id为None时取消全部未结束的任务"""
+		with self._lock:
+			self._cancelled.update(self.pending if job_id is None else (job_id,))
+
+	def shutdown(self):
+		"""取消全部任务；正在执行的任务在下一次报告进度时中止并清理"""
+		self.cancel()
+		self._executor.shutdown(wait=False)
+
+	def _run(self, job_id: int, job):
+		last = 0.
+		def progress(done: int, total: int):
+			nonlocal last
+			if job_id in self._cancelled:
+				raise Cancelled
+			now = time.perf_counter()
+			if done == total or now - last >= self.PROGRESS_INTERVAL:
+				last = now
+				self.progress.emit(job_id, done, total)
+
+		result = error = None
+		try:
+			progress(0, 0)
+			result = job(progress)
+		except Exception as e:
+			error = e
+		finally:
+			with self._lock:
+				self.pending.pop(job_id, None)
+				self._cancelled.discard(job_id)
+		self.finished.emit(job_id, result, error)
+
+class TiledImageItem(QGraphicsItem):
+	"""分块、多级细节（mip金字塔）的图片项
+
+	按当前缩放选择金字塔层级，只把可见的分块转换为QPixmap并放入QPixmapCache，
+	避免把整张超长截图放进一个QPixmap。项的坐标始终是原图像素坐标。"""
+
+	TILE_SIZE = 512
+	_serial = 0
+
+	def __init__(self):
+		super().__init__()
+		self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+		self._levels = {}  # 层级 -> 像素数组，层级n为原图逐次减半n次
+		self._max_level = 0
+		self._width = 0
+		self._height = 0
+		self._key = ''
+
+	def set_image(self, array: np.ndarray, preview=None):
+		"""设置RGBA像素数组（原图层级直接引用，不复制）
+
+		preview为(层级, 缩小图)（见make_preview）时直接作为该层级，缩小显示时不必从原图逐级生成"""
+		self.prepareGeometryChange()
+		TiledImageItem._serial += 1
+		self._key = f'tiles{TiledImageItem._serial}'
+		self._levels = {0: array}
+		if preview is not None:
+			self._levels[preview[0]] = preview[1]
+		self._height, self._width = array.shape[:2]
+		self._max_level, width, height = 0, self._width, self._height
+		while width > 1 or height > 1:
+			width, height = max(width // 2, 1), max(height // 2, 1)
+			self._max_level += 1
+		self.update()
+
+	def boundingRect(self) -> QRectF:
+		return QRectF(0, 0, self._width, self._height)
+
+	def _level(self, index: int) -> int:
+		"""按需从最近的更高分辨率层级逐级生成半分辨率的层级，返回实际可用的层级"""
+		index = min(index, self._max_level)
+		if index not in self._levels:
+			import cv2  # 首次缩小显示时才需要，启动时不导入
+			level = max(level for level in self._levels if level < index)
+			previous = self._levels[level]
+			for level in range(level + 1, index + 1):
+				height, width = previous.shape[:2]
+				previous = self._levels[level] = cv2.resize(previous, (max(width // 2, 1), max(height // 2, 1)), interpolation=cv2.INTER_AREA)
+		return index
+
+	def _tile(self, level: int, tx: int, ty: int) -> QPixmap:
+		key = f'{self._key}/{level}/{tx}/{ty}'
+		pixmap = QPixmapCache.find(key)
+		if pixmap is None:
+			size = self.TILE_SIZE
+			# 向右下多取1像素与相邻分块重叠，避免平滑缩放时分块边缘出现缝隙
+			block = np.ascontiguousarray(self._levels[level][ty*size:(ty+1)*size + 1, tx*size:(tx+1)*size + 1])
+			height, width = block.shape[:2]
+			pixmap = QPixmap.fromImage(QImage(block.data, width, height, width * 4, QImage.Format.Format_RGBA8888))
+			QPixmapCache.insert(key, pixmap)
+		return pixmap
+
+	def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: QWidget = None):
+		if not self._levels:
+			return
+		lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+		level = self._level(int(math.floor(math.log2(1 / lod))) if 0 < lod < 1 else 0)
+		array = self._levels[level]
+		height, width = array.shape[:2]
+		# 层级像素到原图坐标的缩放
+		sx, sy = self._width / width, self._height / height
+
+		exposed = option.exposedRect.intersected(self.boundingRect())
+		if exposed.isEmpty():
+			return
+		size = self.TILE_SIZE
+		tx0 = max(int(exposed.left() / sx) // size, 0)
+		ty0 = max(int(exposed.top() / sy) // size, 0)
+		tx1 = min(int(math.ceil(exposed.right() / sx)), width - 1) // size
+		ty1 = min(int(math.ceil(exposed.bottom() / sy)), height - 1) // size
+
+		painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, lod < 1)
+		for ty in range(ty0, ty1 + 1):
+			for tx in range(tx0, tx1 + 1):
+				pixmap = self._tile(level, tx, ty)
+				target = QRectF(tx * size * sx, ty * size * sy, pixmap.width() * sx, pixmap.height() * sy)
+				painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+class GridOverlayItem(QGraphicsItem):
+	"""网格线与预览框的叠加层
+
+	几何数据保存在列表中，在一次paint()中用drawLines/drawRects批量绘制，
+	拖动时只替换数据并刷新，不再逐条创建和删除场景项。"""
+
+	GRID_PEN = QPen(QColor(0, 120, 215), 2, Qt.PenStyle.DashLine)
+	PREVIEW_PENS = (QPen(QColor(255, 0, 0, 180), 2), QPen(QColor(0, 255, 0, 180), 2))  # 棋盘格交替
+
+	def __init__(self):
+		super().__init__()
+		self._lines = []
+		self._preview = ([], [])
+		self._grid_bounds = QRectF()
+		self._preview_bounds = QRectF()
+
+	def set_grid(self, rect: QRectF, rows: int, cols: int, row_splits=None, col_splits=None):
+		"""设置选区内部的网格线（rows×cols，切分位置见AppConfig.row_splits/col_splits）"""
+		self.prepareGeometryChange()
+		self._lines = []
+		self._grid_bounds = QRectF()
+		if rows > 1 or cols > 1:
+			for x in grid_edges(rect.left(), rect.width(), cols, col_splits)[1:-1]:
+				self._lines.append(QLineF(x, rect.top(), x, rect.bottom()))
+			for y in grid_edges(rect.top(), rect.height(), rows, row_splits)[1:-1]:
+				self._lines.append(QLineF(rect.left(), y, rect.right(), y))
+			self._grid_bounds = QRectF(rect)
+		self.update()
+
+	def set_preview_rects(self, preview_rects, cols: int):
+		"""设置预览框（行优先），按所在行列的奇偶分为两种颜色"""
+		self.prepareGeometryChange()
+		self._preview = ([], [])
+		self._preview_bounds = QRectF()
+		for i, rect in enumerate(preview_rects):
+			row, col = divmod(i, cols)
+			self._preview[(row + col) % 2].append(rect)
+			self._preview_bounds = self._preview_bounds.united(rect)
+		self.update()
+
+	def boundingRect(self) -> QRectF:
+		margin = self.GRID_PEN.widthF() / 2
+		return self._grid_bounds.united(self._preview_bounds).adjusted(-margin, -margin, margin, margin)
+
+	def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: QWidget = None):
+		painter.setBrush(Qt.BrushStyle.NoBrush)
+		for pen, rects in zip(self.PREVIEW_PENS, self._preview):
+			if rects:
+				painter.setPen(pen)
+				painter.drawRects(rects)
+		if self._lines:
+			painter.setPen(self.GRID_PEN)
+			painter.drawLines(self._lines)
+
+class DraggableSelectionBox(QGraphicsView):
+	"""可拖拽调整的选区框 (QGraphicsView)"""
+
+	# 定义调整区域大小
+	HANDLE_SIZE = 8
+
+	# 定义调整区域类型
+	NO_ADJUST = 0
+	TOP_LEFT = 1
+	TOP_RIGHT = 2
+	BOTTOM_LEFT = 3
+	BOTTOM_RIGHT = 4
+	TOP = 5
+	BOTTOM = 6
+	LEFT = 7
+	RIGHT = 8
+	MOVE = 9
+
+	def __init__(self, parent: ImageGridSplitter=None):
+		super().__init__()
+		self._parent = parent
+		self.selection_rect = QRectF(10, 10, 10, 10)  # 默认选区
+		self.is_dragging = False
+		self.drag_start_pos = QPointF()
+		self.drag_type = self.NO_ADJUST
+		self.original_rect = QRectF()
+		self.is_panning = False
+		self.pan_start_pos = QPoint()
+		self._has_initial_fit = False
+		
+		self.setMouseTracking(True)
+		self.setRenderHint(QPainter.Antialiasing)
+		self.setFrameStyle(QFrame.Shape.NoFrame)
+		self.setBackgroundBrush(QBrush(QColor(43, 43, 43)))
+		self.setTransformationAnchor(QGraphicsView.ViewportAnchor.NoAnchor)
+		self.setResizeAnchor(QGraphicsView.ViewportAnchor.NoAnchor)
+		
+		self.scene = QGraphicsScene(self)
+		self.setScene(self.scene)
+		
+		self.image_item = TiledImageItem()
+		self.image_item.hide()  # 初始隐藏
+		self.image_item.setZValue(0)
+		self.scene.addItem(self.image_item)
+		
+		self.selection_item = QGraphicsRectItem()
+		self.selection_item.hide()  # 初始隐藏
+		self.selection_item.setZValue(10)
+		self.selection_item.setPen(QPen(QColor(0, 120, 215), 2))
+		self.selection_item.setBrush(Qt.BrushStyle.NoBrush)
+		self.scene.addItem(self.selection_item)
+		
+		self.handle_items = []
+		for handle_type in (self.TOP_LEFT, self.TOP_RIGHT, self.BOTTOM_LEFT, self.BOTTOM_RIGHT):
+			handle = QGraphicsEllipseItem()
+			handle.hide()  # 初始隐藏
+			handle.setRect(-self.HANDLE_SIZE/2, -self.HANDLE_SIZE/2, self.HANDLE_SIZE, self.HANDLE_SIZE)
+			handle.setBrush(QBrush(QColor(0, 120, 215)))
+			handle.setPen(QPen(QColor(0, 120, 215)))
+			handle.setZValue(11)
+			handle.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIgnoresTransformations, True)
+			handle.setData(0, handle_type)
+			self.scene.addItem(handle)
+			self.handle_items.append(handle)
+		
+		# 预览框画在网格线下方、选区框下方
+		self.overlay_item = GridOverlayItem()
+		self.overlay_item.setZValue(9)
+		self.scene.addItem(self.overlay_item)
+
+	def set_image(self, array: np.ndarray, apply_fit: bool = True, preview=None):
+		self.image_item.set_image(array, preview)
+		self.scene.setSceneRect(QRectF(0, 0, array.shape[1], array.shape[0]))
+		if apply_fit:
+			self.fit_view()
+		self._has_initial_fit = True
+
+		self.image_item.show()
+		self.selection_item.show()
+		for handle in self.handle_items:
+			handle.show()
+
+	def fit_view(self):
+		"""按视口大小重新适配显示变换（只改变视图，不改变场景内容）"""
+		self.resetTransform()
+		self.fitInView(self.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+		if self._parent:
+			scale = self._parent.config.image_scale
+			if scale != 1.0:
+				self.scale(scale, scale)
+
+	def set_selection_rect(self, rect: QRectF, rows: int, cols: int, row_splits=None, col_splits=None):
+		self.selection_rect = rect
+		self._update_selection_items()
+		self.update_grid_items(rows, cols, row_splits, col_splits)
+
+	def _update_selection_items(self):
+		self.selection_item.setRect(self.selection_rect)
+		corners = [
+			self.selection_rect.topLeft(),
+			self.selection_rect.topRight(),
+			self.selection_rect.bottomLeft(),
+			self.selection_rect.bottomRight()
+		]
+		for handle, pos in zip(self.handle_items, corners):
+			handle.setPos(pos)
+
+	def update_grid_items(self, rows: int, cols: int, row_splits=None, col_splits=None):
+		self.overlay_item.set_grid(self.selection_rect, rows, cols, row_splits, col_splits)
+
+	def set_preview_rects(self, preview_rects, rows: int, cols: int):
+		self.overlay_item.set_preview_rects(preview_rects, cols)
+
+	def get_adjustment_type(self, pos: QPointF) -> int:
+		"""根据鼠标位置返回调整类型 (场景坐标)"""
+		# 优先检查手柄
+		item = self.scene.itemAt(pos, self.transform())
+		if item is not None:
+			handle_type = item.data(0)
+			if handle_type is not None:
+				return int(handle_type)
+		
+		rect = self.selection_rect
+		if rect.isNull() or rect.isEmpty():
+			return self.NO_ADJUST
+		
+		scale = self.transform().m11()
+		tol = self.HANDLE_SIZE / scale if scale != 0 else self.HANDLE_SIZE
+		
+		# 检查角部
+		if math.hypot(pos.x() - rect.left(), pos.y() - rect.top()) < tol:
+			return self.TOP_LEFT
+		if math.hypot(pos.x() - rect.right(), pos.y() - rect.top()) < tol:
+			return self.TOP_RIGHT
+		if math.hypot(pos.x() - rect.left(), pos.y() - rect.bottom()) < tol:
+			return self.BOTTOM_LEFT
+		if math.hypot(pos.x() - rect.right(), pos.y() - rect.bottom()) < tol:
+			return self.BOTTOM_RIGHT
+		
+		# 检查边缘
+		if abs(pos.y() - rect.top()) <= tol and rect.left() <= pos.x() <= rect.right():
+			return self.TOP
+		if abs(pos.y() - rect.bottom()) <= tol and rect.left() <= pos.x() <= rect.right():
+			return self.BOTTOM
+		if abs(pos.x() - rect.left()) <= tol and rect.top() <= pos.y() <= rect.bottom():
+			return self.LEFT
+		if abs(pos.x() - rect.right()) <= tol and rect.top() <= pos.y() <= rect.bottom():
+			return self.RIGHT
+		
+		# 检查内部（移动）
+		if rect.contains(pos):
+			return self.MOVE
+
+		return self.NO_ADJUST
+
+	def update_cursor(self, pos: QPointF):
+		"""根据位置更新鼠标光标"""
+		adjust_type = self.get_adjustment_type(pos)
+
+		cursors = {
+			self.TOP_LEFT: Qt.CursorShape.SizeFDiagCursor,
+			self.TOP_RIGHT: Qt.CursorShape.SizeBDiagCursor,
+			self.BOTTOM_LEFT: Qt.CursorShape.SizeBDiagCursor,
+			self.BOTTOM_RIGHT: Qt.CursorShape.SizeFDiagCursor,
+			self.TOP: Qt.CursorShape.SizeVerCursor,
+			self.BOTTOM: Qt.CursorShape.SizeVerCursor,
+			self.LEFT: Qt.CursorShape.SizeHorCursor,
+			self.RIGHT: Qt.CursorShape.SizeHorCursor,
+			self.MOVE: Qt.CursorShape.SizeAllCursor,
+		}
+
+		if adjust_type in cursors:
+			self.setCursor(cursors[adjust_type])
+		else:
+			self.setCursor(Qt.CursorShape.OpenHandCursor)
+
+	def mousePressEvent(self, event: QMouseEvent):
+		if event.button() == Qt.LeftButton:
+			pos_scene = self.mapToScene(event.position().toPoint())
+			drag_type = self.get_adjustment_type(pos_scene)
+			
+			if drag_type != self.NO_ADJUST:
+				# Dragging selection box
+				self.is_dragging = True
+				self.drag_start_pos = pos_scene
+				self.original_rect = QRectF(self.selection_rect)
+				self.drag_type = drag_type
+				self.setFocus()
+			else:
+				# Dragging outside selection box - start panning
+				self.is_panning = True
+				self.pan_start_pos = event.position().toPoint()
+				self.setCursor(Qt.CursorShape.ClosedHandCursor)
+
+	def mouseMoveEvent(self, event: QMouseEvent):
+		if self.is_panning:
+			old_scene = self.mapToScene(self.pan_start_pos)
+			new_scene = self.mapToScene(event.position().toPoint())
+			delta = new_scene - old_scene
+			self.translate(delta.x(), delta.y())
+			self.pan_start_pos = event.position().toPoint()
+			self.setCursor(Qt.CursorShape.ClosedHandCursor)
+			return
+		
+		pos_scene = self.mapToScene(event.position().toPoint())
+		if not self.is_dragging:
+			self.update_cursor(pos_scene)
+			return
+	
+		delta = pos_scene - self.drag_start_pos
+		new_rect = QRectF(self.original_rect)
+
+		# 根据调整类型更新选区
+		if self.drag_type == self.MOVE:
+			new_rect.translate(delta)
+		elif self.drag_type == self.TOP_LEFT:
+			new_rect.setTopLeft(self.original_rect.topLeft() + delta)
+		elif self.drag_type == self.TOP_RIGHT:
+			new_rect.setTopRight(self.original_rect.topRight() + delta)
+		elif self.drag_type == self.BOTTOM_LEFT:
+			new_rect.setBottomLeft(self.original_rect.bottomLeft() + delta)
+		elif self.drag_type == self.BOTTOM_RIGHT:
+			new_rect.setBottomRight(self.original_rect.bottomRight() + delta)
+		elif self.drag_type == self.TOP:
+			new_rect.setTop(self.original_rect.top() + delta.y())
+		elif self.drag_type == self.BOTTOM:
+			new_rect.setBottom(self.original_rect.bottom() + delta.y())
+		elif self.drag_type == self.LEFT:
+			new_rect.setLeft(self.original_rect.left() + delta.x())
+		elif self.drag_type == self.RIGHT:
+			new_rect.setRight(self.original_rect.right() + delta.x())
+
+		# 确保选区在有效范围内
+		if new_rect.width() > 10 and new_rect.height() > 10:
+			self.selection_rect = new_rect
+			self._update_selection_items()
+			config = self._parent.config
+			self.update_grid_items(config.grid_rows, config.grid_cols, config.row_splits, config.col_splits)
+			# 更新归一化选区到配置
+			if self._parent and self._parent.image is not None:
+				self._parent.config.selection_x_normalized = self.selection_rect.x() / self._parent.image.width()
+				self._parent.config.selection_y_normalized = self.selection_rect.y() / self._parent.image.height()
+				self._parent.config.selection_w_normalized = self.selection_rect.width() / self._parent.image.width()
+				self._parent.config.selection_h_normalized = self.selection_rect.height() / self._parent.image.height()
+			# 拖动时在后台实时更新预览
+			if self._parent.config.preview_mode:
+				self._parent.schedule_preview()
+
+	def mouseReleaseEvent(self, event: QMouseEvent):
+		if event.button() == Qt.LeftButton:
+			if self.is_panning:
+				self.is_panning = False
+				self.setCursor(Qt.CursorShape.ArrowCursor)
+			elif self.is_dragging:
+				self.is_dragging = False
+				self._parent.update_preview()
+	
+	def wheelEvent(self, event: QWheelEvent):
+		"""处理滚轮事件进行缩放（以光标为中心）"""
+		if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+			angle_delta = event.angleDelta().y()
+			if angle_delta == 0:
+				return
+			
+			old_pos = self.mapToScene(event.position().toPoint())
+			factor = 1.1 if angle_delta > 0 else 1 / 1.1
+			new_scale = self._parent.config.image_scale * factor
+			new_scale = max(0.1, min(10.0, new_scale))
+			factor = new_scale / self._parent.config.image_scale
+			self._parent.config.image_scale = new_scale
+			
+			self.scale(factor, factor)
+			new_pos = self.mapToScene(event.position().toPoint())
+			delta = new_pos - old_pos
+			self.translate(delta.x(), delta.y())
+			
+			event.accept()
+		else:
+			super().wheelEvent(event)
+
+class ImageGridSplitter(QMainWindow):
+	"""主窗口类"""
+
+	PREVIEW_INTERVAL = 15  # 拖动时预览请求的最小间隔（毫秒）
+	RESIZE_INTERVAL = 50  # 窗口大小停止变化多久后重新适配视图（毫秒）
+
+	def __init__(self):
+		super().__init__()
+		self.config = AppConfig.load()
+		self.current_image_path = None
+		self.image = None
+		self.image_array = None
+		self.border_index = None
+		self.analysis = None  # 当前图片在分析缓存中的记录（见prepare_image）
+		self.analysis_cache = AnalysisCache(self.config.cache_dir, self.config.cache_size_mb * 1024**2) if self.config.cache_dir else None
+		self.image_rect = QRect()
+		self.preview_rects = []
+		self.preview_worker = PreviewWorker(self)
+		self.preview_worker.finished.connect(self.apply_preview)
+		self.preview_timer = QTimer(self)
+		self.preview_timer.setSingleShot(True)
+		self.preview_timer.setInterval(self.PREVIEW_INTERVAL)
+		self.preview_timer.timeout.connect(self.update_preview)
+		self.batch_worker = BatchWorker(self)
+		self.batch_worker.progress.connect(self.batch_progress)
+		self.batch_worker.finished.connect(self.batch_finished)
+		self.batch_results = []
+		self.batch_total = 0
+		# 分割和导出依次在jobs中执行，加载图片在单独的队列中，导出上一张图片时可以加载下一张
+		self.jobs = JobQueue('jobs', self)
+		self.loader = JobQueue('load', self)
+		for queue in (self.jobs, self.loader):
+			queue.progress.connect(self.job_progress)
+			queue.finished.connect(self.job_finished)
+		self.job_handlers = {}  # 任务号 -> 结束时在界面线程中调用的handler(返回值, 异常)
+
+		# 合并连续的窗口大小变化，停止变化后只重新适配一次视图
+		self.resize_timer = QTimer(self)
+		self.resize_timer.setSingleShot(True)
+		self.resize_timer.setInterval(self.RESIZE_INTERVAL)
+		self.resize_timer.timeout.connect(self.fit_view)
+
+		# 超长截图超过默认的图片分配上限，显示分块缓存放宽到256MB
+		QImageReader.setAllocationLimit(0)
+		QPixmapCache.setCacheLimit(256 * 1024)
+
+		self.init_ui()
+		self.setAcceptDrops(True)
+		self.resize(self.config.window_width, self.config.window_height)
+
+	def init_ui(self):
+		"""初始化用户界面"""
+		self.setWindowTitle('图片网格分割工具')
+		self.setWindowIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogContentsView))
+
+		# 创建中央部件
+		central_widget = QWidget()
+		self.setCentralWidget(central_widget)
+
+		# 主布局
+		main_layout = QVBoxLayout(central_widget)
+
+		# 工具栏
+		toolbar = self.create_toolbar()
+		toolbar.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+		main_layout.addWidget(toolbar)
+
+		# 图片显示区域
+		self.image_label = DraggableSelectionBox(self)
+		self.image_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+		self.image_label.setMinimumSize(400, 300)
+		main_layout.addWidget(self.image_label, 1)
+
+		# 控制面板
+		control_panel = self.create_control_panel()
+		control_panel.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+		main_layout.addWidget(control_panel)
+
+		# 状态栏
+		self.preview_latency_label = QLabel('')
+		self.statusBar().addPermanentWidget(self.preview_latency_label)
+		self.job_label = QLabel('')
+		self.job_bar = QProgressBar()
+		self.job_bar.setMaximumWidth(200)
+		self.job_cancel_btn = QPushButton('取消')
+		self.job_cancel_btn.setToolTip('取消正在执行和排队的分割/导出任务，并删除已写出的部分')
+		self.job_cancel_btn.clicked.connect(lambda: self.jobs.cancel())
+		for widget in (self.job_label, self.job_bar, self.job_cancel_btn):
+			self.statusBar().addPermanentWidget(widget)
+			widget.hide()
+		self.trace_label = QLabel('')
+		if trace.enabled():
+			self.statusBar().addPermanentWidget(self.trace_label)
+		self.statusBar().showMessage('拖放图片文件到窗口开始使用')
+
+	def create_toolbar(self) -> QWidget:
+		"""创建工具栏"""
+		toolbar = QWidget()
+		toolbar.setMaximumHeight(50)
+		layout = QHBoxLayout(toolbar)
+		layout.setContentsMargins(10, 5, 10, 5)
+
+		# 打开按钮
+		self.open_btn = QPushButton('打开图片')
+		self.open_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
+		self.open_btn.clicked.connect(self.open_image)
+		layout.addWidget(self.open_btn)
+
+		# 分割按钮
+		self.split_btn = QPushButton('分割图片')
+		self.split_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
+		self.split_btn.clicked.connect(self.split_image)
+		layout.addWidget(self.split_btn)
+
+		# PDF导出按钮
+		self.pdf_btn = QPushButton('导出PDF')
+		self.pdf_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_FileIcon))
+		self.pdf_btn.clicked.connect(self.export_pdf)
+		layout.addWidget(self.pdf_btn)
+
+		# 批量处理按钮
+		self.batch_btn = QPushButton('批量处理')
+		self.batch_btn.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon))
+		self.batch_btn.setToolTip('用当前的选区、网格和导出设置处理多张图片')
+		self.batch_btn.clicked.connect(self.batch_process)
+		layout.addWidget(self.batch_btn)
+
+		layout.addStretch()
+
+		# 裁剪边框复选框
+		self.cut_border_checkbox = QCheckBox('裁剪边框')
+		self.cut_border_checkbox.setChecked(self.config.cut_border)
+		self.cut_border_checkbox.stateChanged.connect(self.toggle_cut_border)
+		layout.addWidget(self.cut_border_checkbox)
+
+		# 预览模式复选框
+		self.preview_checkbox = QCheckBox('预览模式')
+		self.preview_checkbox.setChecked(self.config.preview_mode)
+		self.preview_checkbox.stateChanged.connect(self.toggle_preview)
+		layout.addWidget(self.preview_checkbox)
+
+		# 显示信息
+		self.info_label = QLabel('')
+		layout.addWidget(self.info_label)
+
+		return toolbar
+
+	def create_control_panel(self) -> QWidget:
+		"""创建控制面板"""
+		panel = QWidget()
+		panel.setMaximumHeight(100)
+		layout = QHBoxLayout(panel)
+		layout.setContentsMargins(15, 10, 15, 10)
+
+		rows_cols_layout = QFormLayout()
+
+		# 行数控制
+
+		self.rows_spin = QSpinBox()
+		self.rows_spin.setMinimum(1)
+		self.rows_spin.setValue(self.config.grid_rows)
+		self.rows_spin.setFixedWidth(80)
+		self.rows_spin.valueChanged.connect(self.update_grid)
+
+		rows_cols_layout.addRow('行数', self.rows_spin)
+
+		# 列数控制
+
+		self.cols_spin = QSpinBox()
+		self.cols_spin.setMinimum(1)
+		self.cols_spin.setValue(self.config.grid_cols)
+		self.cols_spin.setFixedWidth(80)
+		self.cols_spin.valueChanged.connect(self.update_grid)
+
+		rows_cols_layout.addRow('列数', self.cols_spin)
+
+		layout.addLayout(rows_cols_layout)
+
+		# 自动网格按钮
+		self.auto_grid_btn = QPushButton('自动网格')
+		self.auto_grid_btn.setToolTip('按背景分隔带自动设置选区和网格（支持不等宽/高的格子）')
+		self.auto_grid_btn.clicked.connect(self.auto_grid)
+		layout.addWidget(self.auto_grid_btn)
+
+		# 自动分页按钮
+		self.auto_pages_btn = QPushButton('自动分页')
+		self.auto_pages_btn.setToolTip('按PDF页面比例（上次导出PDF时选择的页面，默认A4）把选区分为单列的若干页，切分尽量落在空白处（适合长截图）')
+		self.auto_pages_btn.clicked.connect(self.auto_pages)
+		layout.addWidget(self.auto_pages_btn)
+		# layout.addLayout(quick_btn_layout)
+		layout.addStretch()
+
+		return panel
+
+	def update_grid(self):
+		"""更新网格设置"""
+		self.config.grid_rows = self.rows_spin.value()
+		self.config.grid_cols = self.cols_spin.value()
+		# 行/列数改变后原来的非均匀切分不再适用，恢复均分
+		if not valid_splits(self.config.row_splits, self.config.grid_rows):
+			self.config.row_splits = None
+		if not valid_splits(self.config.col_splits, self.config.grid_cols):
+			self.config.col_splits = None
+
+		# Update preview if in preview mode
+		if self.config.preview_mode and self.image is not None:
+			self.update_preview()
+		
+		self.image_label.update_grid_items(self.config.grid_rows, self.config.grid_cols, self.config.row_splits, self.config.col_splits)
+
+		# 更新信息显示
+		if self.image is not None:
+			self.update_info()
+
+	def auto_grid(self):
+		"""由背景分隔带检测选区和网格切分位置"""
+		if self.image is None:
+			QMessageBox.warning(self, '错误', '请先加载图片！')
+			return
+
+		with trace.span('auto_grid'):
+			detected = detect_grid(self.border_index.gray)
+		self.show_trace('auto_grid')
+		if detected is None:
+			self.statusBar().showMessage('未检测到内容，网格保持不变')
+			return
+
+		(x, y, w, h), row_splits, col_splits = detected
+		width, height = self.image.width(), self.image.height()
+		self.config.selection_x_normalized = x / width
+		self.config.selection_y_normalized = y / height
+		self.config.selection_w_normalized = w / width
+		self.config.selection_h_normalized = h / height
+		self.config.row_splits = row_splits or None
+		self.config.col_splits = col_splits or None
+		self.config.grid_rows, self.config.grid_cols = len(row_splits) + 1, len(col_splits) + 1
+		self.sync_grid_spins()
+
+		rect = QRectF(*selection_rect(self.config, width, height))
+		self.image_label.set_selection_rect(rect, self.config.grid_rows, self.config.grid_cols, self.config.row_splits, self.config.col_splits)
+		self.update_grid()
+		self.statusBar().showMessage(f'自动网格: {self.config.grid_rows}×{self.config.grid_cols}')
+
+	def auto_pages(self):
+		"""按PDF页面比例在选区内的空白带上分页，设置为单列网格"""
+		if self.image is None:
+			QMessageBox.warning(self, '错误', '请先加载图片！')
+			return
+
+		rect = self.split_rect()  # 与分割、导出相同的选区
+		if rect is None:
+			return
+		with trace.span('auto_pages'):
+			row_splits = detect_pages(self.border_index.gray, rect, self.config.page_size())
+		self.show_trace('auto_pages')
+		self.config.row_splits = row_splits or None
+		self.config.col_splits = None
+		self.config.grid_rows, self.config.grid_cols = len(row_splits) + 1, 1
+		self.sync_grid_spins()
+		self.update_grid()
+		self.statusBar().showMessage(f'自动分页: {self.config.grid_rows}页（{self.config.pdf_preset}）')
+
+	def sync_grid_spins(self):
+		"""按config设置行/列数输入框；行列数都设置好后再统一刷新，避免中途触发update_grid时切分数量与行/列数不符被清除"""
+		for spin, value in ((self.rows_spin, self.config.grid_rows), (self.cols_spin, self.config.grid_cols)):
+			spin.blockSignals(True)
+			spin.setValue(value)
+			spin.blockSignals(False)
+
+	def update_info(self):
+		"""更新信息显示"""
+		if self.image is None:
+			return
+	
+		total = self.config.grid_rows * self.config.grid_cols
+		if self.current_image_path:
+			info = f"{self.current_image_path} | 网格: {self.config.grid_rows}×{self.config.grid_cols} = {total}张图片"
+		else:
+			# For clipboard images without a file path
+			info = f"剪贴板图片 ({self.image.width()}×{self.image.height()}) | 网格: {self.config.grid_rows}×{self.config.grid_cols} = {total}张图片"
+		self.info_label.setText(info)
+
+	def update_preview(self):
+		"""更新预览边界框（在后台线程计算，结果到达后再绘制）"""
+		if not (self.config.preview_mode and self.image is not None):
+			self.preview_worker.cancel()
+			self.preview_rects = []
+			self.image_label.set_preview_rects([], self.config.grid_rows, self.config.grid_cols)
+			return
+
+		label_rect = self.image_label.selection_rect
+		rect = (label_rect.left(), label_rect.top(), label_rect.width(), label_rect.height())
+		index = self.border_index if self.config.cut_border else None
+		self.preview_worker.request(partial(
+			traced_preview_rects, rect, self.config.grid_rows, self.config.grid_cols, index, self.config.row_splits, self.config.col_splits
+		))
+
+	def schedule_preview(self):
+		"""拖动过程中节流预览请求，每个计时周期最多提交一次"""
+		if not self.preview_timer.isActive():
+			self.preview_timer.start()
+
+	def apply_preview(self, generation: int, rects, requested: float):
+		"""接收后台预览结果，丢弃过期的结果"""
+		if generation != self.preview_worker.generation or not self.config.preview_mode or rects is None:
+			return
+		self.preview_rects = [QRectF(*rect) for rect in rects]
+		self.image_label.set_preview_rects(self.preview_rects, self.config.grid_rows, self.config.grid_cols)
+		self.preview_latency_label.setText(f'预览延迟: {(time.perf_counter() - requested) * 1000:.0f} ms')
+		self.update_cache_stats()
+		self.show_trace('update_preview')
+
+	def show_trace(self, name: str):
+		"""开启计时时在状态栏显示该操作最近一次的分阶段耗时"""
+		record = trace.last(name)
+		if record is not None:
+			self.trace_label.setText(trace.describe(record))
+
+	def update_cache_stats(self):
+		"""在状态栏预览延迟的提示中显示边框缓存命中统计"""
+		info = border_cache.info()
+		self.preview_latency_label.setToolTip(
+			f'边框缓存: 命中 {info["hits"]} / 未命中 {info["misses"]}，{info["entries"]}/{info["max_entries"]} 项'
+		)
+
+	def open_image(self):
+		"""打开图片文件"""
+		file_path, _ = QFileDialog.getOpenFileName(
+			self, '选择图片', '',
+			'图片文件 (*.png *.jpg *.jpeg *.bmp *.gif *.tiff)'
+		)
+
+		if file_path:
+			self.load_image(file_path)
+
+	def load_image(self, file_path: str):
+		"""在后台读取并加载图片"""
+		self.start_loading(partial(read_image, file_path, self.analysis_cache), file_path)
+
+	def paste_image_from_clipboard(self):
+		"""从剪贴板粘贴图片"""
+		clipboard = QApplication.clipboard()
+		mime_data = clipboard.mimeData()
+
+		# Check if clipboard has image data
+		if mime_data.hasImage():
+			pixmap = clipboard.pixmap()
+			if not pixmap.isNull():
+				# Load directly from pixmap without temporary file
+				self.load_image_from_pixmap(pixmap)
+				return
+
+		# Check if clipboard has file URLs (like from file manager)
+		if mime_data.hasUrls():
+			urls = mime_data.urls()
+			for url in urls:
+				file_path = url.toLocalFile()
+				if file_path.lower().endswith(IMAGE_EXTENSIONS):
+					self.load_image(file_path)
+					return
+
+		# If no image found
+		self.statusBar().showMessage('剪贴板中没有图片或图片文件路径')
+
+	def load_image_from_pixmap(self, pixmap: QPixmap):
+		"""从QPixmap直接加载图片（用于剪贴板粘贴）"""
+		if pixmap.isNull():
+			QMessageBox.warning(self, '错误', '无法加载图片！')
+			return
+	
+		# QPixmap只能在界面线程中使用，转换为QImage后再交给加载线程
+		with trace.span('toImage'):
+			image = pixmap.toImage()
+
+		def job(progress):
+			with trace.span('load_image'):
+				prepared = prepare_image(image, self.analysis_cache)
+			progress(1, 1)
+			return prepared
+
+		self.start_loading(job, None)  # No file path for clipboard images
+
+	def start_loading(self, job, file_path):
+		"""提交加载任务；只保留最新的加载请求，之前未完成的加载被取消"""
+		self.loader.cancel()
+		self.submit_job(self.loader, job, partial(self.image_loaded, file_path))
+		self.statusBar().showMessage(f'正在加载: {os.path.basename(file_path)}' if file_path else '正在加载剪贴板图片')
+
+	def image_loaded(self, file_path, prepared, error):
+		"""加载任务结束：显示图片（见prepare_image）"""
+		if isinstance(error, Cancelled):
+			return
+		if error is not None or prepared is None:
+			QMessageBox.warning(self, '错误', '无法加载图片文件！' if file_path else '无法加载图片！')
+			return
+		self.remember_image()
+		self.set_image(*prepared)
+		self.show_trace('load_image')
+		# 之前处理过的图片恢复当时的选区和网格，预览框直接使用缓存的边框
+		cached = self.analysis is not None and self.analysis.apply(self.config)
+		if cached:
+			self.sync_grid_spins()
+
+		self.current_image_path = file_path
+		self.scale_image()
+		self.update_info()
+		message = f'已加载: {os.path.basename(file_path)}' if file_path else '已从剪贴板加载图片'
+		self.statusBar().showMessage(message + ('（已恢复上次的选区和网格）' if cached else ''))
+
+	def update_job_status(self):
+		"""在状态栏显示正在执行的分割/导出任务、进度和排队数，没有任务时隐藏"""
+		labels = list(self.jobs.pending.values())
+		if labels:
+			queued = len(labels) - 1
+			self.job_label.setText(labels[0] + (f'（另有{queued}个任务排队）' if queued else ''))
+		for widget in (self.job_label, self.job_bar, self.job_cancel_btn):
+			widget.setVisible(bool(labels))
+
+	def set_image(self, image: QImage, array: np.ndarray, index: BorderIndex, analysis: ImageAnalysis = None):
+		"""设置当前图片及其共享内存的RGBA像素视图、边框索引和缓存记录（见prepare_image），供显示、预览、分割和导出使用"""
+		self.image = image
+		self.image_array = array
+		self.border_index = index
+		self.analysis = analysis
+
+	def remember_image(self):
+		"""把当前图片的选区、网格和检测过的边框写入分析缓存（分割、导出、切换图片和退出时）"""
+		if self.analysis_cache is not None and self.analysis is not None:
+			with trace.span('remember_image'):
+				self.analysis_cache.remember(self.analysis, self.config, (self.image.width(), self.image.height()), self.border_index.margins())
+
+	def submit_job(self, queue: JobQueue, job, handler, label: str = '') -> int:
+		"""把任务提交到queue，结束时在界面线程中调用handler(返回值, 异常)"""
+		job_id = queue.submit(job, label)
+		self.job_handlers[job_id] = handler
+		if queue is self.jobs:
+			self.update_job_status()
+		return job_id
+
+	def job_progress(self, job_id: int, done: int, total: int):
+		if job_id in self.jobs.pending:  # 加载任务只在状态栏提示
+			self.job_bar.setRange(0, total)
+			self.job_bar.setValue(done)
+			self.update_job_status()
+
+	def job_finished(self, job_id: int, result, error):
+		self.update_job_status()
+		handler = self.job_handlers.pop(job_id, None)
+		if handler is not None:
+			handler(result, error)
+
+	def scale_image(self):
+		"""缩放图片以适应显示区域"""
+		if self.image is None:
+			return
+		self.image_label.set_image(self.image_array, apply_fit=True, preview=self.analysis.preview if self.analysis is not None else None)
+		
+		rect = QRectF(*selection_rect(self.config, self.image.width(), self.image.height()))
+		self.image_label.set_selection_rect(rect, self.config.grid_rows, self.config.grid_cols, self.config.row_splits, self.config.col_splits)
+		
+		self.update_preview()
+
+	def fit_view(self):
+		"""重新适配视图（窗口大小变化、Ctrl+0），选区与预览保持不变"""
+		if self.image is None:
+			return
+		self.image_label.fit_view()
+
+	def toggle_cut_border(self, state):
+		"""切换裁剪边框选项"""
+		self.config.cut_border = (state == Qt.CheckState.Checked.value)
+		self.update_preview()
+
+	def toggle_preview(self, state):
+		"""切换预览模式"""
+		self.config.preview_mode = (state == Qt.CheckState.Checked.value)
+		self.update_preview()
+
+	def split_rect(self):
+		"""选区在原图中的整数区域(x, y, w, h)，没有图片或选区为空时返回None"""
+		if self.image is None:
+			return None
+		label_rect = self.image_label.selection_rect
+		return crop_rect(
+			(label_rect.left(), label_rect.top(), label_rect.width(), label_rect.height()),
+			self.image.width(), self.image.height()
+		)
+
+	def get_split_images(self):
+		"""获取分割后的图片数组列表（在调用线程中检测边框；分割和导出在后台任务中调用cut_cells）"""
+		rect = self.split_rect()
+		if rect is None:
+			return []
+		images = cut_cells(self.image_array, rect, self.config, self.border_index)
+		self.update_cache_stats()
+		self.show_trace('get_split_images')
+		return images
+
+	def split_image(self):
+		"""分割图片"""
+		if self.image is None:
+			QMessageBox.warning(self, '错误', '请先加载图片！')
+			return
+
+		# Determine default directory and base name
+		if self.current_image_path:
+			default_dir = os.path.dirname(self.current_image_path)
+			base_name = os.path.splitext(os.path.basename(self.current_image_path))[0]
+		else:
+			# For clipboard images
+			default_dir = os.path.expanduser('~')
+			base_name = 'clipboard_image'
+
+		# Create dialog for output settings
+		dialog = QDialog(self)
+		dialog.setWindowTitle('分割设置')
+		dialog_layout = QVBoxLayout(dialog)
+
+		format_group = QGroupBox('格式')
+		format_layout = QHBoxLayout()
+
+		format_combo = QComboBox()
+		for key, label in (('png', 'PNG'), ('jpeg', 'JPEG'), ('webp', 'WebP'), ('avif', 'AVIF'), ('tiff', '多页TIFF')):
+			format_combo.addItem(label, key)
+		format_combo.setCurrentIndex(max(format_combo.findData(self.config.image_format), 0))
+		format_layout.addWidget(format_combo)
+
+		alpha_checkbox = QCheckBox('保留透明通道')
+		alpha_checkbox.setChecked(self.config.keep_alpha)
+		format_layout.addWidget(alpha_checkbox)
+
+		format_group.setLayout(format_layout)
+		dialog_layout.addWidget(format_group)
+
+		png_group = QGroupBox('PNG')
+		png_layout = QHBoxLayout()
+
+		compression_combo = QComboBox()
+		for key, label in (('fast', '快速'), ('default', '默认'), ('max', '最小文件')):
+			compression_combo.addItem(label, key)
+		compression_combo.setCurrentIndex(max(compression_combo.findData(self.config.png_compression), 0))
+		png_layout.addWidget(QLabel('压缩:'))
+		png_layout.addWidget(compression_combo)
+
+		optimize_checkbox = QCheckBox('优化')
+		optimize_checkbox.setChecked(self.config.png_optimize)
+		png_layout.addWidget(optimize_checkbox)
+
+		png_group.setLayout(png_layout)
+		dialog_layout.addWidget(png_group)
+
+		encode_group = QGroupBox('JPEG / WebP / AVIF / TIFF')
+		encode_layout = QHBoxLayout()
+
+		quality_spin = QSpinBox()
+		quality_spin.setRange(1, 100)
+		quality_spin.setValue(self.config.image_quality)
+		encode_layout.addWidget(QLabel('质量:'))
+		encode_layout.addWidget(quality_spin)
+
+		effort_combo = QComboBox()
+		for key, label in (('fast', '快速'), ('default', '默认'), ('max', '最小文件')):
+			effort_combo.addItem(label, key)
+		effort_combo.setCurrentIndex(max(effort_combo.findData(self.config.image_effort), 0))
+		encode_layout.addWidget(QLabel('编码:'))
+		encode_layout.addWidget(effort_combo)
+
+		encode_group.setLayout(encode_layout)
+		dialog_layout.addWidget(encode_group)
+
+		def update_format():
+			image_format = format_combo.currentData()
+			png_group.setEnabled(image_format == 'png')
+			encode_group.setEnabled(image_format != 'png')
+			quality_spin.setEnabled(image_format in LOSSY_FORMATS)
+			alpha_checkbox.setEnabled(image_format != 'jpeg')
+
+		format_combo.currentIndexChanged.connect(update_format)
+		update_format()
+
+		# Buttons
+		button_box = QHBoxLayout()
+		ok_btn = QPushButton('确定')
+		cancel_btn = QPushButton('取消')
+		ok_btn.clicked.connect(dialog.accept)
+		cancel_btn.clicked.connect(dialog.reject)
+		button_box.addWidget(ok_btn)
+		button_box.addWidget(cancel_btn)
+		dialog_layout.addLayout(button_box)
+
+		if dialog.exec() != QDialog.DialogCode.Accepted:
+			return
+
+		self.config.image_format = format_combo.currentData()
+		self.config.image_quality = quality_spin.value()
+		self.config.image_effort = effort_combo.currentData()
+		self.config.png_compression = compression_combo.currentData()
+		self.config.png_optimize = optimize_checkbox.isChecked()
+		self.config.keep_alpha = alpha_checkbox.isChecked()
+
+		# 选择保存目录
+		save_dir = QFileDialog.getExistingDirectory(
+			self, '选择保存目录',
+			default_dir
+		)
+
+		if not save_dir:
+			return
+
+		rect = self.split_rect()
+		if rect is None:
+			QMessageBox.warning(self, '错误', '无法获取分割图片！')
+			return
+		self.remember_image()
+
+		# 边框检测（冷缓存、大网格时较慢）和编码都在任务中进行，界面不会卡住。
+		# 格子是当前图片缓冲区上的视图，任务结束前保持对图片的引用；配置取副本，排队期间的修改不影响本次任务
+		image, array, index, config = self.image, self.image_array, self.border_index, replace(self.config)
+		count = config.grid_rows * config.grid_cols
+
+		def job(progress):
+			with trace.span('split_image'):
+				progress(0, count)
+				images = cut_cells(array, rect, config, index)
+				# Save images using PIL (encoded in parallel)
+				return save_cells(
+					images, save_dir, base_name, config.grid_cols, config.png_compression, config.png_optimize, alpha=config.keep_alpha,
+					format=config.image_format, quality=config.image_quality, effort=config.image_effort, progress=progress
+				)
+
+		self.submit_job(self.jobs, job, partial(self.split_finished, image, save_dir, config.image_format), f'分割 {base_name}')
+
+	def split_finished(self, image: QImage, save_dir: str, format: str, result, error):
+		"""分割任务结束：报告结果"""
+		self.update_cache_stats()
+		self.show_trace('split_image')
+		if isinstance(error, Cancelled):
+			self.statusBar().showMessage('已取消分割，已删除本次写出的图片')
+			return
+		if error is not None:
+			QMessageBox.critical(self, '错误', f'分割失败:\n{error}')
+			return
+
+		saved_count, failures = result
+		# tiff把全部格子写入一个多页文件
+		saved = f'1 个TIFF文件（{saved_count} 页）' if format == 'tiff' and saved_count else f'{saved_count} 张图片'
+
+		if failures:
+			details = '\n'.join(f'{os.path.basename(path)}: {error}' for path, error in failures[:10])
+			if len(failures) > 10:
+				details += f'\n...（共{len(failures)}张）'
+			QMessageBox.warning(
+				self, '部分失败',
+				f'成功保存了 {saved}到:\n{save_dir}\n\n以下图片保存失败:\n{details}'
+			)
+			return
+
+		QMessageBox.information(
+			self, '完成',
+			f'成功分割并保存了 {saved}到:\n{save_dir}'
+		)
+
+	def export_pdf(self):
+		"""导出PDF"""
+		if self.image is None:
+			QMessageBox.warning(self, '错误', '请先加载图片！')
+			return
+
+		# Create dialog for PDF settings
+		dialog = QDialog(self)
+		dialog.setWindowTitle('PDF导出设置')
+		dialog_layout = QVBoxLayout(dialog)
+
+		# Page size selection
+		size_group = QGroupBox('页面尺寸')
+		size_layout = QHBoxLayout()
+
+		size_combo = QComboBox()
+		size_combo.addItems([*PDF_PRESETS, PDF_CUSTOM_PRESET])
+		size_combo.setCurrentText(self.config.pdf_preset)
+		size_layout.addWidget(QLabel('预设:'))
+		size_layout.addWidget(size_combo)
+
+		width_spin = QDoubleSpinBox()
+		width_spin.setRange(5, 100)
+		width_spin.setValue(self.config.pdf_width_spin)
+		width_spin.setSuffix(' cm')
+		width_spin.setDecimals(1)
+
+		height_spin = QDoubleSpinBox()
+		height_spin.setRange(5, 100)
+		height_spin.setValue(self.config.pdf_height_spin)
+		height_spin.setSuffix(' cm')
+		height_spin.setDecimals(1)
+
+		def update_size():
+			preset = size_combo.currentText()
+			if preset in PDF_PRESETS:
+				width, height = PDF_PRESETS[preset]
+				width_spin.setValue(width)
+				height_spin.setValue(height)
+				width_spin.setEnabled(False)
+				height_spin.setEnabled(False)
+			else:
+				width_spin.setEnabled(True)
+				height_spin.setEnabled(True)
+
+		size_combo.currentTextChanged.connect(update_size)
+		update_size()
+
+		size_layout.addWidget(QLabel('宽度:'))
+		size_layout.addWidget(width_spin)
+		size_layout.addWidget(QLabel('高度:'))
+		size_layout.addWidget(height_spin)
+
+		size_group.setLayout(size_layout)
+		dialog_layout.addWidget(size_group)
+
+		# Image encoding
+		encoding_group = QGroupBox('图片编码')
+		encoding_layout = QHBoxLayout()
+
+		encoding_combo = QComboBox()
+		encoding_combo.addItem('无损 (Flate)', 'flate')
+		encoding_combo.addItem('JPEG (DCT)', 'jpeg')
+		encoding_combo.setCurrentIndex(max(encoding_combo.findData(self.config.pdf_encoding), 0))
+		encoding_layout.addWidget(encoding_combo)
+
+		quality_spin = QSpinBox()
+		quality_spin.setRange(1, 95)
+		quality_spin.setValue(self.config.pdf_jpeg_quality)
+		encoding_layout.addWidget(QLabel('质量:'))
+		encoding_layout.addWidget(quality_spin)
+
+		alpha_checkbox = QCheckBox('保留透明通道')
+		alpha_checkbox.setChecked(self.config.keep_alpha)
+		encoding_layout.addWidget(alpha_checkbox)
+
+		def update_encoding():
+			quality_spin.setEnabled(encoding_combo.currentData() == 'jpeg')
+
+		encoding_combo.currentIndexChanged.connect(update_encoding)
+		update_encoding()
+
+		encoding_group.setLayout(encoding_layout)
+		dialog_layout.addWidget(encoding_group)
+
+		single_image_checkbox = QCheckBox('原图只嵌入一次，各页裁剪显示（未裁剪边框时有效，文件更小）')
+		single_image_checkbox.setChecked(self.config.pdf_single_image)
+		dialog_layout.addWidget(single_image_checkbox)
+
+		# Buttons
+		button_box = QHBoxLayout()
+		ok_btn = QPushButton('确定')
+		cancel_btn = QPushButton('取消')
+		ok_btn.clicked.connect(dialog.accept)
+		cancel_btn.clicked.connect(dialog.reject)
+		button_box.addWidget(ok_btn)
+		button_box.addWidget(cancel_btn)
+		dialog_layout.addLayout(button_box)
+
+		if dialog.exec() != QDialog.DialogCode.Accepted:
+			return
+
+		self.config.pdf_preset = size_combo.currentText()
+		self.config.pdf_width_spin = width_spin.value()
+		self.config.pdf_height_spin = height_spin.value()
+		self.config.pdf_encoding = encoding_combo.currentData()
+		self.config.pdf_jpeg_quality = quality_spin.value()
+		self.config.keep_alpha = alpha_checkbox.isChecked()
+		self.config.pdf_single_image = single_image_checkbox.isChecked()
+
+		# Determine default save path
+		if self.current_image_path:
+			default_path = os.path.splitext(self.current_image_path)[0] + '.pdf'
+		else:
+			default_path = os.path.join(os.path.expanduser('~'), 'clipboard_image.pdf')
+
+		# Get PDF file path
+		save_path, _ = QFileDialog.getSaveFileName(
+			self, '保存PDF',
+			default_path,
+			'PDF文件 (*.pdf)'
+		)
+
+		if not save_path:
+			return
+
+		# Get page size in points (1 cm = 28.3465 points)
+		page_width, page_height = self.config.page_size()
+
+		rect = self.split_rect()
+		if rect is None:
+			QMessageBox.warning(self, '错误', '无法获取分割图片！')
+			return
+		self.remember_image()
+
+		# 同split_image，边框检测在任务中进行，任务结束前保持对图片的引用，使用配置副本
+		image, array, index, config, source = self.image, self.image_array, self.border_index, replace(self.config), self.current_image_path
+
+		def job(progress):
+			with trace.span('export_pdf'):
+				progress(0, config.grid_rows * config.grid_cols)
+				images = cut_cells(array, rect, config, index)
+				export_pdf(images, save_path, page_width, page_height, config.pdf_encoding, config.pdf_jpeg_quality, source, config.keep_alpha, config.pdf_single_image,
+					progress)
+
+		self.submit_job(self.jobs, job, partial(self.export_finished, image, save_path), f'导出 {os.path.basename(save_path)}')
+
+	def export_finished(self, image: QImage, save_path: str, result, error):
+		"""PDF导出任务结束：报告结果"""
+		self.update_cache_stats()
+		self.show_trace('export_pdf')
+		if isinstance(error, Cancelled):
+			self.statusBar().showMessage('已取消导出，已删除未完成的PDF')
+		elif error is not None:
+			QMessageBox.critical(self, '错误', f'PDF导出失败:\n{str(error)}')
+		else:
+			QMessageBox.information(self, '完成', f'PDF已保存到:\n{save_path}')
+
+	def batch_process(self):
+		"""批量处理：对选中的多张图片套用当前的选区、网格和导出设置"""
+		dialog = QDialog(self)
+		dialog.setWindowTitle('批量处理')
+		dialog_layout = QVBoxLayout(dialog)
+
+		export_layout = QHBoxLayout()
+		export_combo = QComboBox()
+		export_combo.addItem('PNG', 'png')
+		export_combo.addItem('PDF', 'pdf')
+		export_combo.addItem('PNG + PDF', 'both')
+		export_combo.addItem('合并为一个PDF', 'merge')
+		export_layout.addWidget(QLabel('导出:'))
+		export_layout.addWidget(export_combo)
+		dialog_layout.addLayout(export_layout)
+
+		auto_grid_checkbox = QCheckBox('每张图自动检测网格')
+		dialog_layout.addWidget(auto_grid_checkbox)
+		paginate_checkbox = QCheckBox('每张图按PDF页面比例自动分页')
+		dialog_layout.addWidget(paginate_checkbox)
+		# 两者互斥
+		auto_grid_checkbox.toggled.connect(lambda checked: checked and paginate_checkbox.setChecked(False))
+		paginate_checkbox.toggled.connect(lambda checked: checked and auto_grid_checkbox.setChecked(False))
+
+		# Buttons
+		button_box = QHBoxLayout()
+		ok_btn = QPushButton('确定')
+		cancel_btn = QPushButton('取消')
+		ok_btn.clicked.connect(dialog.accept)
+		cancel_btn.clicked.connect(dialog.reject)
+		button_box.addWidget(ok_btn)
+		button_box.addWidget(cancel_btn)
+		dialog_layout.addLayout(button_box)
+
+		if dialog.exec() != QDialog.DialogCode.Accepted:
+			return
+
+		default_dir = os.path.dirname(self.current_image_path) if self.current_image_path else ''
+		paths, _ = QFileDialog.getOpenFileNames(
+			self, '选择图片', default_dir,
+			'图片文件 (*.png *.jpg *.jpeg *.bmp *.gif *.tiff)'
+		)
+		if not paths:
+			return
+
+		export = export_combo.currentData()
+		auto_grid = auto_grid_checkbox.isChecked()
+		paginate = paginate_checkbox.isChecked()
+		# 传入配置副本，处理期间界面上的修改不影响本批
+		config = replace(self.config)
+		if export == 'merge':
+			save_path, _ = QFileDialog.getSaveFileName(
+				self, '保存PDF',
+				os.path.splitext(paths[0])[0] + '.pdf',
+				'PDF文件 (*.pdf)'
+			)
+			if not save_path:
+				return
+			job = partial(merge_pdf, paths, config, save_path, auto_grid, paginate=paginate)
+		else:
+			save_dir = QFileDialog.getExistingDirectory(
+				self, '选择保存目录',
+				os.path.dirname(paths[0])
+			)
+			if not save_dir:
+				return
+			job = partial(run_batch, paths, config, save_dir, export, auto_grid, paginate=paginate)
+
+		self.batch_results = []
+		self.batch_total = len(paths)
+		self.batch_btn.setEnabled(False)
+		self.statusBar().showMessage(f'批量处理: 0/{self.batch_total}')
+		self.batch_worker.start(job)
+
+	def batch_progress(self, result):
+		self.batch_results.append(result)
+		self.statusBar().showMessage(f'批量处理: {len(self.batch_results)}/{self.batch_total}  {result.describe()}')
+
+	def batch_finished(self, seconds: float, error):
+		self.batch_btn.setEnabled(True)
+		if error is not None:
+			self.statusBar().showMessage('批量处理失败')
+			QMessageBox.critical(self, '错误', f'批量处理失败:\n{error}')
+			return
+		summary = summarize(self.batch_results, seconds)
+		self.statusBar().showMessage(f'批量处理完成: {summary}')
+		failures = [result.describe() for result in self.batch_results if result.error is not None]
+		if failures:
+			QMessageBox.warning(self, '批量处理', summary + '\n\n' + '\n'.join(failures[:10]))
+		else:
+			QMessageBox.information(self, '批量处理', summary)
+
+	# 拖放功能
+	def dragEnterEvent(self, event: QDragEnterEvent):
+		if event.mimeData().hasUrls():
+			event.acceptProposedAction()
+
+	def dropEvent(self, event: QDropEvent):
+		urls = event.mimeData().urls()
+		if urls:
+			file_path = urls[0].toLocalFile()
+			if file_path.lower().endswith(IMAGE_EXTENSIONS):
+				self.load_image(file_path)
+				event.acceptProposedAction()
+
+	def keyPressEvent(self, event: QKeyEvent):
+		"""处理键盘事件，包括Ctrl+V粘贴图片，Ctrl+0重置缩放和平移"""
+		# Check if Ctrl+V is pressed and focus is not on spinbox
+		if event.key() == Qt.Key.Key_V and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
+			# Check if focus is on spinbox - if so, let it handle paste
+			focused_widget = QApplication.focusWidget()
+			if isinstance(focused_widget, QSpinBox):
+				super().keyPressEvent(event)
+				return
+	
+			# Try to paste image from clipboard
+			self.paste_image_from_clipboard()
+		else:
+			super().keyPressEvent(event)
+
+		if event.key() == Qt.Key.Key_0 and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
+			# Reset image translation and scale
+			# self.config.image_translation_x_normalized = 0.0
+			# self.config.image_translation_y_normalized = 0.0
+			self.config.image_scale = 1.0
+			self.fit_view()
+
+	# 窗口事件
+	def resizeEvent(self, event: QResizeEvent):
+		"""窗口大小改变时的事件"""
+		super().resizeEvent(event)
+		# Refit the view once the resize burst is over; selection and preview are unaffected
+		if self.image is not None:
+			self.resize_timer.start()
+
+		# 保存窗口大小
+		self.config.window_width = self.width()
+		self.config.window_height = self.height()
+
+	def closeEvent(self, event: QCloseEvent):
+		"""关闭窗口时保存配置；还有未完成的分割/导出任务时先确认"""
+		if self.jobs.pending and QMessageBox.question(
+			self, '退出', f'还有{len(self.jobs.pending)}个分割/导出任务未完成，取消这些任务并退出？'
+		) != QMessageBox.StandardButton.Yes:
+			event.ignore()
+			return
+		self.preview_worker.shutdown()
+		self.batch_worker.shutdown()
+		self.jobs.shutdown()
+		self.loader.shutdown()
+		self.remember_image()
+		self.config.save()
+		event.accept()
+
+def main():
+	"""主函数"""
+	app = QApplication(sys.argv)
+	app.setStyle('Fusion')  # 使用Fusion风格，更美观
+
+	# 设置应用程序样式
+	app.setStyleSheet("""
+		QMainWindow {
+			background-color: #323232;
+		}
+		QGroupBox {
+			font-weight: bold;
+			border: 1px solid #555;
+			border-radius: 4px;
+			margin-top: 10px;
+			padding-top: 10px;
+		}
+		QGroupBox::title {
+			subcontrol-origin: margin;
+			left: 10px;
+			padding: 0 5px 0 5px;
+		}
+		QPushButton {
+			background-color: #505050;
+			border: 1px solid #555;
+			border-radius: 3px;
+			padding: 5px 15px;
+			min-width: 80px;
+		}
+		QPushButton:hover {
+			background-color: #606060;
+			border: 1px solid #666;
+		}
+		QPushButton:pressed {
+			background-color: #404040;
+		}
+		QSpinBox {
+			padding: 3px;
+			border: 1px solid #555;
+			border-radius: 3px;
+			background-color: #404040;
+		}
+		QToolButton {
+			background-color: #505050;
+			border: 1px solid #555;
+			border-radius: 2px;
+		}
+		QToolButton:hover {
+			background-color: #606060;
+		}
+		QStatusBar {
+			background-color: #2b2b2b;
+			color: #aaa;
+		}
+	""")
+
+	window = ImageGridSplitter()
+	window.show()
+	# 窗口显示后再在后台导入cv2和PIL，不拖慢首次绘制
+	QTimer.singleShot(0, preload)
+
+	sys.exit(app.exec())
+
+if __name__ == '__main__':
+	main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""轻量计时：按阶段记录耗时，并写出可在chrome://tracing或Perfetto中打开的Chrome trace JSON
+
+设置环境变量IMGRID_TRACE=输出路径（或命令行--trace 输出路径）开启；未开启时span几乎没有开销。
+span可以嵌套，同一线程内子阶段的耗时会汇总到父阶段，describe()据此生成一行摘要。
+只保留最近的MAX_EVENTS个事件：界面中拖动选区时每帧预览都为每个格子记录detect_border，长时间开启不会耗尽内存。"""
+import os
+import json
+import time
+import atexit
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+DEFAULT_PATH = 'imgrid-trace.json'
+MAX_EVENTS = 100000  # 每个事件约几百字节
+
+_enabled = False
+_path = None
+_events = deque(maxlen=MAX_EVENTS)
+_thread_names = []  # 线程名元数据事件，不随_events淘汰
+_threads = set()
+_lock = threading.Lock()
+_local = threading.local()
+_last = {}  # 名称 -> 最近一次完成的顶层Span
+_origin = time.perf_counter_ns()
+
+class Span:
+	"""一次计时的结果：名称、耗时（秒）和同线程子阶段的累计耗时"""
+	__slots__ = ('name', 'duration', 'children')
+
+	def __init__(self, name: str):
+		self.name = name
+		self.duration = 0.
+		self.children = defaultdict(float)
+
+def enable(path: str = DEFAULT_PATH):
+	"""开启计时，退出时把trace写入path"""
+	global _enabled, _path
+	if not _enabled:
+		atexit.register(write)
+	_enabled = True
+	_path = path
+
+def enabled() -> bool:
+	return _enabled
+
+@contextmanager
+def span(name: str, **args):
+	"""计时上下文，开启时产出Span（退出后可读取duration），未开启时产出None"""
+	if not _enabled:
+		yield None
+		return
+	stack = getattr(_local, 'stack', None)
+	if stack is None:
+		stack = _local.stack = []
+	record = Span(name)
+	stack.append(record)
+	start = time.perf_counter_ns()
+	try:
+		yield record
+	finally:
+		end = time.perf_counter_ns()
+		stack.pop()
+		record.duration = (end - start) / 1e9
+		if stack:
+			stack[-1].children[name] += record.duration
+		else:
+			_last[name] = record
+		_record(name, start, end, args)
+
+def _record(name, start, end, args):
+	thread = threading.current_thread()
+	tid = threading.get_native_id()
+	event = {'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+		'ts': (start - _origin) / 1000, 'dur': (end - start) / 1000}
+	if args:
+		event['args'] = {key: str(value) for key, value in args.items()}
+	with _lock:
+		if tid not in _threads:
+			_threads.add(tid)
+			_thread_names.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': thread.name}})
+		_events.append(event)
+
+def last(name: str):
+	"""返回名为name的最近一次顶层Span，没有则返回None"""
+	return _last.get(name)
+
+def describe(record: Span) -> str:
+	"""一行摘要，如 'split_image 1520 ms (get_split_images 210 ms, save_cells 1300 ms)'"""
+	text = f'{record.name} {record.duration * 1000:.0f} ms'
+	if record.children:
+		text += ' (' + ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in record.children.items()) + ')'
+	return text
+
+def write(path: str = None):
+	"""把已记录的事件写为Chrome trace JSON"""
+	path = path or _path
+	if not path:
+		return
+	with _lock:
+		events = _thread_names + list(_events)
+	with open(path, 'w') as f:
+		json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+if os.environ.get('IMGRID_TRACE'):
+	enable(DEFAULT_PATH if os.environ['IMGRID_TRACE'] == '1' else os.environ['IMGRID_TRACE'])